@@ -1,12 +1,14 @@
 from flask import Flask, render_template, jsonify, request, session, redirect, url_for
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
-from flask_socketio import SocketIO, emit
+from flask_socketio import SocketIO, emit, join_room
 from flask_login import LoginManager, current_user, login_user, logout_user, login_required
 from werkzeug.security import generate_password_hash, check_password_hash
 import os
 import json
+import random
 from datetime import datetime, timedelta
+from types import SimpleNamespace
 
 # Initialize Flask app
 app = Flask(__name__)
@@ -26,20 +28,94 @@ from models.world import Region, Location, WorldState
 from models.quest import Quest, QuestStep, QuestProgress
 from models.npc import NPC, NPCRelationship
 from models.item import Item, ItemTemplate
+from models.queries import discovered_region_ids, region_summaries
 
 # Import services
 from services.llm_service import LLMService
+from services.llm_cache import LLMResponseCache
+from services.llm_client import LLMClient
+from services.llm_metrics import LLMMetrics
 from services.world_gen import WorldGenerator
 from services.quest_gen import QuestGenerator
 from services.combat import CombatManager
 from services.weather_service import WeatherService
+from services.warm_pool import ContentWarmPool
+from services.npc_memory import ConversationMemory
+from services.dialogue_pool import DialogueVariantPool
+from services.chunks import ChunkManager
+from services.region_maps import RegionMapStore
+from services.nav_fields import RegionNavigation
 
 # Initialize services
-llm_service = LLMService(app.config['OPENAI_API_KEY'])
+llm_cache = None
+if app.config['LLM_CACHE_ENABLED']:
+    llm_cache = LLMResponseCache(
+        db_path=app.config['LLM_CACHE_PATH'],
+        max_entries=app.config['LLM_CACHE_MAX_ENTRIES'],
+        max_persistent_entries=app.config['LLM_CACHE_MAX_PERSISTENT_ENTRIES'],
+        ttls=app.config['LLM_CACHE_TTLS']
+    )
+llm_client = LLMClient(
+    mode=app.config['LLM_CLIENT_MODE'],
+    max_workers=app.config['LLM_MAX_WORKERS'],
+    request_timeout=app.config['LLM_REQUEST_TIMEOUT'],
+    max_retries=app.config['LLM_MAX_RETRIES']
+)
+llm_metrics = LLMMetrics()
+llm_metrics.start_logging(app.config['LLM_METRICS_LOG_INTERVAL'])
+llm_service = LLMService(
+    app.config['OPENAI_API_KEY'],
+    cache=llm_cache,
+    client=llm_client,
+    deadlines=app.config['LLM_DEADLINES'],
+    api_base=app.config['LLM_STUB_URL'] if app.config['LLM_USE_STUB'] else None,
+    vary_shared_results=app.config['LLM_VARY_SHARED_RESULTS'],
+    history_token_budget=app.config['NPC_MEMORY_HISTORY_TOKEN_BUDGET'],
+    summary_max_words=app.config['NPC_MEMORY_SUMMARY_MAX_WORDS'],
+    breaker_settings=app.config['LLM_BREAKER_SETTINGS'],
+    hedge_deadlines=app.config['LLM_HEDGE_DEADLINES'],
+    metrics=llm_metrics,
+    model_tiers=app.config['LLM_MODEL_TIERS'],
+    model_routes=app.config['LLM_MODEL_ROUTES']
+)
 world_generator = WorldGenerator(llm_service)
+chunk_manager = ChunkManager(
+    world_generator,
+    chunk_size=app.config['REGION_CHUNK_SIZE'],
+    max_chunks=app.config['REGION_CHUNK_CACHE_SIZE']
+)
+region_maps = RegionMapStore(
+    world_generator,
+    max_regions=app.config['REGION_MAP_CACHE_SIZE'],
+    store_procedural=app.config['REGION_STORE_PROCEDURAL_MAPS']
+)
+region_navigation = RegionNavigation(
+    chunk_manager,
+    max_regions=app.config['NAV_CACHE_REGIONS'],
+    max_flow_fields=app.config['NAV_FLOW_FIELDS_PER_REGION']
+)
 quest_generator = QuestGenerator(llm_service)
 combat_manager = CombatManager()
 weather_service = WeatherService(app.config['WEATHER_API_KEY'])
+warm_pool = ContentWarmPool(
+    pool_size=app.config['WARM_POOL_SIZE'],
+    level_band=app.config['WARM_POOL_LEVEL_BAND'],
+    workers=app.config['WARM_POOL_WORKERS'],
+    max_keys=app.config['WARM_POOL_MAX_KEYS']
+)
+conversation_memory = ConversationMemory(
+    llm_service,
+    app,
+    summarize_every=app.config['NPC_MEMORY_SUMMARIZE_EVERY'],
+    recent_turns=app.config['NPC_MEMORY_RECENT_TURNS']
+)
+dialogue_pool = DialogueVariantPool(
+    variants=app.config['DIALOGUE_POOL_VARIANTS'],
+    max_uses=app.config['DIALOGUE_POOL_MAX_USES'],
+    intents=app.config['DIALOGUE_POOL_INTENTS'],
+    max_keys=app.config['DIALOGUE_POOL_MAX_KEYS'],
+    workers=app.config['DIALOGUE_POOL_WORKERS']
+)
 
 # Setup login manager
 @login_manager.user_loader
@@ -57,6 +133,11 @@ app.register_blueprint(game_bp)
 app.register_blueprint(character_bp)
 app.register_blueprint(admin_bp)
 
+# Register CLI commands
+from commands import register_commands
+
+register_commands(app)
+
 # Root route
 @app.route('/')
 def index():
@@ -72,17 +153,50 @@ def get_regions():
     if not character:
         return jsonify({"error": "No active character"}), 404
     
-    discovered_regions = []
-    for region in Region.query.all():
-        # Check if the character has discovered this region
-        if WorldState.query.filter_by(
-            character_id=character_id,
-            region_id=region.id,
-            discovered=True
-        ).first():
-            discovered_regions.append(region.to_dict())
+    # Summaries only; tiles come from the map endpoint unless include_map is set
+    include_map = request.args.get('include_map', '').lower() in ('1', 'true', 'yes')
+    region_ids = discovered_region_ids(character_id)
+    
+    return jsonify(region_summaries(region_ids, include_map=include_map))
+
+def get_discovered_region(region_id):
+    """Get a region the active character has discovered, or None"""
+    world_state = WorldState.query.filter_by(
+        character_id=current_user.active_character_id,
+        region_id=region_id,
+        discovered=True
+    ).first()
+    return world_state.region if world_state else None
+
+@app.route('/api/world/region/<int:region_id>/map')
+@login_required
+def get_region_map(region_id):
+    """Get a region's full map data"""
+    # Same rule as the region listing: only discovered regions are visible
+    region = get_discovered_region(region_id)
+    if not region:
+        return jsonify({"error": "Region not found"}), 404
+    
+    return jsonify({
+        'region_id': region.id,
+        'map_data': region.get_map_data()
+    })
+
+@app.route('/api/world/region/<int:region_id>/viewport')
+@login_required
+def get_region_viewport(region_id):
+    """Get the tiles of a rectangular window of a region, generating chunks as needed"""
+    region = get_discovered_region(region_id)
+    if not region:
+        return jsonify({"error": "Region not found"}), 404
     
-    return jsonify(discovered_regions)
+    x = request.args.get('x', 0, type=int)
+    y = request.args.get('y', 0, type=int)
+    max_size = app.config['REGION_VIEWPORT_MAX_SIZE']
+    width = max(1, min(request.args.get('width', 32, type=int), max_size))
+    height = max(1, min(request.args.get('height', 32, type=int), max_size))
+    
+    return jsonify(chunk_manager.get_viewport(region, x, y, width, height))
 
 @app.route('/api/world/generate_region', methods=['POST'])
 @login_required
@@ -97,8 +211,14 @@ def generate_region():
     if not character:
         return jsonify({"error": "No active character"}), 404
     
-    # Generate region using the world generator service
-    region_data = world_generator.generate_region(theme, difficulty, character.level)
+    # Generate region using the world generator service (served from the warm pool when ready)
+    player_level = character.level
+    # The producer is shared by everyone with this key, so it only uses the key's parameters
+    band = warm_pool.level_band(player_level)
+    region_data = warm_pool.take(
+        ('region', theme, difficulty, band),
+        lambda: world_generator.generate_region(theme, difficulty, warm_pool.band_level(band))
+    )
     
     # Create new region in database
     new_region = Region(
@@ -106,8 +226,9 @@ def generate_region():
         description=region_data['description'],
         theme=theme,
         difficulty=difficulty,
-        map_data=json.dumps(region_data['map_data'])
+        seed=region_data.get('seed') or random.randint(1, 1000000)
     )
+    region_maps.assign(new_region, region_data)
     db.session.add(new_region)
     db.session.flush()  # Get ID without committing
     
@@ -153,8 +274,27 @@ def generate_quest():
     if not region:
         return jsonify({"error": "Region not found"}), 404
     
-    # Generate quest using the quest generator service
-    quest_data = quest_generator.generate_quest(character, region, quest_type)
+    # Generate quest using the quest generator service (served from the warm pool when ready).
+    # Refills run outside the request, so the producer works from plain snapshots of the rows.
+    # It is shared by every player with the same key, so the character is described by the key alone.
+    band = warm_pool.level_band(character.level)
+    character_snapshot = SimpleNamespace(
+        name='adventurer',
+        level=warm_pool.band_level(band),
+        character_class=character.character_class
+    )
+    region_snapshot = SimpleNamespace(
+        id=region.id,
+        name=region.name,
+        description=region.description,
+        theme=region.theme,
+        difficulty=region.difficulty
+    )
+    # Prompts name the region, so pooled quests are kept per region rather than per theme
+    quest_data = warm_pool.take(
+        ('quest', region.id, region.theme, region.difficulty, band, character.character_class, quest_type),
+        lambda: quest_generator.generate_quest(character_snapshot, region_snapshot, quest_type)
+    )
     
     # Create new quest in database
     new_quest = Quest(
@@ -247,70 +387,26 @@ def npc_dialogue():
     
     # Get character and relationship data
     character = Character.query.get(character_id)
-    relationship = NPCRelationship.query.filter_by(
-        character_id=character_id,
-        npc_id=npc_id
-    ).first()
-    
-    if not relationship:
-        # Create default neutral relationship
-        relationship = NPCRelationship(
-            character_id=character_id,
-            npc_id=npc_id,
-            status='neutral',
-            value=50  # Neutral value
+    relationship = get_or_create_relationship(character_id, npc_id)
+    
+    # Get dialogue from LLM service, with the rolling summary standing in for older turns
+    summary, conversation_history = conversation_memory.get_context(character_id, npc_id)
+    
+    dialogue_data = None
+    if dialogue_pool.serves(intent, conversation_history, summary):
+        # Nothing to respond to yet, so a stock line for this NPC answers instantly
+        dialogue_data = get_pooled_dialogue(npc, intent, relationship)
+    if dialogue_data is None:
+        dialogue_data = llm_service.generate_dialogue(
+            npc, 
+            character, 
+            conversation_history, 
+            intent,
+            relationship,
+            summary=summary
         )
-        db.session.add(relationship)
-        db.session.commit()
     
-    # Get dialogue from LLM service
-    conversation_history = session.get('conversation_history', {}).get(str(npc_id), [])
-    
-    dialogue_data = llm_service.generate_dialogue(
-        npc, 
-        character, 
-        conversation_history, 
-        intent,
-        relationship
-    )
-    
-    # Update conversation history in session
-    if 'conversation_history' not in session:
-        session['conversation_history'] = {}
-    
-    if str(npc_id) not in session['conversation_history']:
-        session['conversation_history'][str(npc_id)] = []
-    
-    # Add new dialogue to history
-    session['conversation_history'][str(npc_id)].append({
-        'speaker': 'npc',
-        'text': dialogue_data['text'],
-        'timestamp': datetime.utcnow().isoformat()
-    })
-    
-    # Limit conversation history to last 10 exchanges
-    if len(session['conversation_history'][str(npc_id)]) > 20:
-        session['conversation_history'][str(npc_id)] = session['conversation_history'][str(npc_id)][-20:]
-    
-    session.modified = True
-    
-    # Update relationship based on dialogue
-    if dialogue_data.get('relationship_change'):
-        relationship.value += dialogue_data['relationship_change']
-        # Keep in range 0-100
-        relationship.value = max(0, min(100, relationship.value))
-        
-        # Update status based on value
-        if relationship.value >= 80:
-            relationship.status = 'friendly'
-        elif relationship.value >= 50:
-            relationship.status = 'neutral'
-        elif relationship.value >= 20:
-            relationship.status = 'unfriendly'
-        else:
-            relationship.status = 'hostile'
-            
-        db.session.commit()
+    record_dialogue(npc_id, relationship, dialogue_data)
     
     return jsonify(dialogue_data)
 
@@ -327,8 +423,13 @@ def initiate_combat():
     if not character:
         return jsonify({"error": "No active character"}), 404
     
-    # Generate enemy using LLM
-    enemy_data = llm_service.generate_enemy(enemy_type, difficulty, character.level)
+    # Generate enemy using LLM (served from the warm pool when ready)
+    player_level = character.level
+    band = warm_pool.level_band(player_level)
+    enemy_data = warm_pool.take(
+        ('enemy', enemy_type, difficulty, band),
+        lambda: llm_service.generate_enemy(enemy_type, difficulty, warm_pool.band_level(band))
+    )
     
     # Initialize combat in session
     session['combat'] = {
@@ -439,7 +540,126 @@ def handle_world_update(data):
                 room = f"user_{current_user.id}"
                 emit('position_updated', {'x': x, 'y': y}, room=room)
 
-# Helper function
+@socketio.on('npc_dialogue')
+def handle_npc_dialogue(data):
+    """Stream NPC dialogue to the player's room as it is generated"""
+    if not current_user.is_authenticated:
+        return
+    
+    character_id = current_user.active_character_id
+    if not character_id:
+        return
+    
+    npc_id = data.get('npc_id')
+    intent = data.get('intent', 'general')
+    room = f"user_{current_user.id}"
+    
+    npc = NPC.query.get(npc_id)
+    if not npc:
+        emit('dialogue_error', {'npc_id': npc_id, 'error': 'NPC not found'}, room=room)
+        return
+    
+    character = Character.query.get(character_id)
+    relationship = get_or_create_relationship(character_id, npc_id)
+    summary, conversation_history = conversation_memory.get_context(character_id, npc_id)
+    
+    dialogue_data = None
+    if dialogue_pool.serves(intent, conversation_history, summary):
+        dialogue_data = get_pooled_dialogue(npc, intent, relationship)
+    if dialogue_data is not None:
+        emit('dialogue_chunk', {'npc_id': npc_id, 'text': dialogue_data['text']}, room=room)
+    else:
+        for event, payload in llm_service.stream_dialogue(npc, character, conversation_history, intent,
+                                                          relationship, summary=summary):
+            if event == 'chunk':
+                emit('dialogue_chunk', {'npc_id': npc_id, 'text': payload}, room=room)
+                # Yield so each chunk is flushed to the client immediately
+                socketio.sleep(0)
+            else:
+                dialogue_data = payload
+    
+    record_dialogue(npc_id, relationship, dialogue_data)
+    
+    # Structured fields arrive once the full response is known
+    emit('dialogue_complete', {
+        'npc_id': npc_id,
+        'text': dialogue_data['text'],
+        'tone': dialogue_data.get('tone'),
+        'relationship_change': dialogue_data.get('relationship_change', 0),
+        'offers_quest': dialogue_data.get('offers_quest', False),
+        'offers_trade': dialogue_data.get('offers_trade', False)
+    }, room=room)
+
+# Helper functions
+def get_or_create_relationship(character_id, npc_id):
+    """Get a character's relationship with an NPC, creating a neutral one if missing"""
+    relationship = NPCRelationship.query.filter_by(
+        character_id=character_id,
+        npc_id=npc_id
+    ).first()
+    
+    if not relationship:
+        # Create default neutral relationship
+        relationship = NPCRelationship(
+            character_id=character_id,
+            npc_id=npc_id,
+            status='neutral',
+            value=50  # Neutral value
+        )
+        db.session.add(relationship)
+        db.session.commit()
+    
+    return relationship
+
+def get_pooled_dialogue(npc, intent, relationship):
+    """Serve a stock line for an NPC, intent and relationship status from the variant pool;
+    None if no line is stored and generating one failed"""
+    # Plain snapshots, since variants are generated on background threads outside the session
+    npc_snapshot = SimpleNamespace(
+        name=npc.name,
+        race=npc.race,
+        occupation=npc.occupation,
+        personality=npc.personality,
+        dialogue_traits=npc.dialogue_traits
+    )
+    relationship_snapshot = SimpleNamespace(status=relationship.status, value=relationship.value)
+    # Variants are shared by every player, so they are written for an anonymous listener
+    listener = SimpleNamespace(name='traveler', level=1, character_class='adventurer')
+    
+    # Fallback lines must not be stored as variants, so a failed generation raises instead
+    try:
+        return dialogue_pool.take(
+            (npc.id, intent, relationship.status),
+            lambda: llm_service.generate_dialogue(npc_snapshot, listener, [], intent, relationship_snapshot,
+                                                  variant=True, fallback=False)
+        )
+    except Exception as e:
+        print(f"Error generating a stock line for NPC {npc.id}: {e}")
+        return None
+
+def record_dialogue(npc_id, relationship, dialogue_data):
+    """Store an NPC line in the conversation memory and apply its relationship change"""
+    # Server-side memory; older turns are folded into a summary in the background
+    conversation_memory.record_turn(relationship.character_id, npc_id, 'npc', dialogue_data['text'])
+    
+    # Update relationship based on dialogue
+    if dialogue_data.get('relationship_change'):
+        relationship.value += dialogue_data['relationship_change']
+        # Keep in range 0-100
+        relationship.value = max(0, min(100, relationship.value))
+        
+        # Update status based on value
+        if relationship.value >= 80:
+            relationship.status = 'friendly'
+        elif relationship.value >= 50:
+            relationship.status = 'neutral'
+        elif relationship.value >= 20:
+            relationship.status = 'unfriendly'
+        else:
+            relationship.status = 'hostile'
+            
+        db.session.commit()
+
 def calculate_next_level_xp(level):
     """Calculate XP needed for next level"""
     return 100 * level * level
@@ -0,0 +1,139 @@
+"""Benchmarks for the procedural world generation stages.
+
+Run with ``python -m benchmarks.world_gen``. Each stage is timed (median of
+--repeat runs) and traced once with tracemalloc for peak memory. --save writes
+the results as the JSON baseline; later runs compare against it and exit with
+status 1 when a stage is slower or larger than the baseline by more than
+--threshold.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from services.world_gen import THEME_TILES, WorldGenerator
+
+DEFAULT_SIZES = [32, 64, 128, 256, 512]
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baselines', 'world_gen.json')
+SEED = 12345
+
+def _build_stages(generator, size, theme):
+    """Set up inputs for one (size, theme) pair; returns {stage: callable}"""
+    rng = random.Random(SEED)
+    terrain = generator._generate_terrain_map(size, size, theme, SEED, rng)['tiles']
+    landmarks = generator._generate_landmarks(size, size, theme, 5, rng, terrain)
+
+    stages = {
+        'terrain_map': lambda: generator._generate_terrain_map(size, size, theme, SEED, random.Random(SEED)),
+        'find_path': lambda: generator._find_path(terrain, 2, 2, size - 3, size - 3),
+        'paths_between_landmarks': lambda: generator._add_paths_between_landmarks(terrain, landmarks)
+    }
+    # These two don't depend on the terrain theme, so they run once per size
+    if theme == 'town':
+        stages['town_features'] = lambda: generator._add_town_features([row.copy() for row in terrain], size, size)
+    if theme == 'dungeon':
+        stages['dungeon_layout'] = lambda: generator._generate_dungeon_layout(size, size, random.Random(SEED))
+    return stages
+
+def _measure(func, repeat):
+    """Median wall time over repeat runs, then one traced run for peak memory"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {'seconds': statistics.median(timings), 'peak_kib': peak / 1024}
+
+def run_benchmarks(sizes, themes, repeat):
+    """Run every stage for every size and theme; returns {'stage/theme/size': measurement}"""
+    generator = WorldGenerator(None)
+    results = {}
+    for size in sizes:
+        for theme in themes:
+            for stage, func in _build_stages(generator, size, theme).items():
+                key = f"{stage}/{theme}/{size}"
+                results[key] = _measure(func, repeat)
+                print(f"{key:<45} {results[key]['seconds'] * 1000:10.2f} ms {results[key]['peak_kib']:12.1f} KiB")
+    return results
+
+def compare(results, baseline, threshold, min_seconds):
+    """List stages that regressed against the baseline by more than threshold (as a fraction)"""
+    regressions = []
+    for key, current in sorted(results.items()):
+        previous = baseline.get(key)
+        if not previous:
+            continue
+
+        seconds_limit = max(previous['seconds'] * (1 + threshold), previous['seconds'] + min_seconds)
+        if current['seconds'] > seconds_limit:
+            regressions.append(f"{key}: {previous['seconds'] * 1000:.2f} ms -> {current['seconds'] * 1000:.2f} ms")
+
+        # Allow a little slack so tiny stages don't trip on allocator noise
+        memory_limit = max(previous['peak_kib'] * (1 + threshold), previous['peak_kib'] + 64)
+        if current['peak_kib'] > memory_limit:
+            regressions.append(f"{key}: {previous['peak_kib']:.1f} KiB -> {current['peak_kib']:.1f} KiB peak")
+    return regressions
+
+def main(argv=None):
+    """Command line entry point; returns the process exit status"""
+    parser = argparse.ArgumentParser(description='Benchmark procedural world generation')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--themes', nargs='+', default=list(THEME_TILES), choices=list(THEME_TILES))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save', action='store_true', help='Write the results as the new baseline')
+    parser.add_argument('--threshold', type=float, default=0.25, help='Allowed regression as a fraction')
+    parser.add_argument('--min-seconds', type=float, default=0.002, help='Ignore time regressions below this')
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.sizes, args.themes, args.repeat)
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, 'w') as f:
+            json.dump({
+                'environment': {
+                    'python': platform.python_version(),
+                    'numpy': np.__version__,
+                    'machine': platform.machine(),
+                    'processor': platform.processor()
+                },
+                'results': results
+            }, f, indent=2, sort_keys=True)
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save to create one")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)['results']
+
+    regressions = compare(results, baseline, args.threshold, args.min_seconds)
+    if regressions:
+        print(f"{len(regressions)} regressions beyond {args.threshold:.0%}:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+
+    print(f"No regressions beyond {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
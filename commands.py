@@ -0,0 +1,230 @@
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import click
+from flask.cli import with_appcontext
+
+# Per-process generator for generate-regions workers
+_worker_generator = None
+
+def _init_region_worker():
+    """Pool initializer: give each worker its own generator and random state"""
+    global _worker_generator
+    from services.world_gen import WorldGenerator
+
+    # Reseed so names never repeat across workers, whatever the start method
+    random.seed()
+    _worker_generator = WorldGenerator(None)
+
+def _reserve_ids(db, model, count):
+    """Allocate count primary keys for a bulk insert that has to know its ids up front.
+    Must run at the start of a transaction; returns None when the backend can't reserve them safely"""
+    from sqlalchemy import func, text
+
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        # Draw the ids from the table's sequence so concurrent inserts can't reuse them
+        rows = db.session.execute(
+            text("SELECT nextval(pg_get_serial_sequence(:table, 'id')) FROM generate_series(1, :count)"),
+            {'table': model.__table__.name, 'count': count}
+        )
+        return [row[0] for row in rows]
+
+    if dialect == 'sqlite':
+        # Take the database write lock before reading max(id), so the running game can't
+        # insert until this batch commits
+        db.session.execute(text('BEGIN IMMEDIATE'))
+        start = (db.session.query(func.max(model.id)).scalar() or 0) + 1
+        return list(range(start, start + count))
+
+    return None
+
+def _generate_region_job(job):
+    """Generate one procedural region in a worker process"""
+    theme, difficulty, player_level = job
+    region_data = _worker_generator._generate_procedural_region(theme, difficulty, player_level)
+    region_data['theme'] = theme
+    region_data['difficulty'] = difficulty
+    return region_data
+
+@click.command('convert-region-maps')
+@click.option('--batch-size', default=100, show_default=True, help='Regions converted per commit')
+@with_appcontext
+def convert_region_maps(batch_size):
+    """Re-encode regions still stored as JSON map_data into the compact tile blob"""
+    from app import db
+    from models.world import Region
+
+    converted = 0
+    skipped = 0
+    bytes_before = 0
+    bytes_after = 0
+    last_id = 0
+
+    while True:
+        regions = Region.query.filter(
+            Region.id > last_id,
+            Region.map_blob.is_(None),
+            Region.map_data.isnot(None)
+        ).order_by(Region.id).limit(batch_size).all()
+        if not regions:
+            break
+
+        for region in regions:
+            last_id = region.id
+            size = len(region.map_data.encode('utf-8'))
+            try:
+                region.set_map_data(region.get_map_data())
+            except ValueError as e:
+                print(f"Skipping region {region.id}: {e}")
+                skipped += 1
+                continue
+
+            if region.map_blob is None:
+                # Irregular map; it stays as JSON
+                skipped += 1
+                continue
+            converted += 1
+            bytes_before += size
+            bytes_after += len(region.map_blob)
+
+        db.session.commit()
+
+    click.echo(f"Converted {converted} regions ({skipped} skipped): "
+               f"{bytes_before} bytes of JSON -> {bytes_after} bytes encoded")
+
+@click.command('regenerate-region-maps')
+@click.option('--batch-size', default=100, show_default=True, help='Regions upgraded per commit')
+@with_appcontext
+def regenerate_region_maps(batch_size):
+    """Bring regions stored as seed + generator version up to the current generator version"""
+    from app import db, region_maps
+    from models.world import Region
+    from services.world_gen import GENERATOR_VERSION
+
+    upgraded = 0
+    moved = 0
+    last_id = 0
+
+    while True:
+        regions = Region.query.filter(
+            Region.id > last_id,
+            Region.generator_version.isnot(None),
+            Region.generator_version != GENERATOR_VERSION
+        ).order_by(Region.id).limit(batch_size).all()
+        if not regions:
+            break
+
+        for region in regions:
+            last_id = region.id
+            moved += region_maps.upgrade(region)
+            upgraded += 1
+
+        db.session.commit()
+
+    click.echo(f"Upgraded {upgraded} regions to generator version {GENERATOR_VERSION} ({moved} locations moved)")
+
+@click.command('generate-regions')
+@click.option('--count', default=100, show_default=True, help='Regions to generate')
+@click.option('--theme', 'themes', multiple=True, help='Theme to use (repeatable); defaults to all themes')
+@click.option('--difficulty', default=1, show_default=True, help='Difficulty of the generated regions')
+@click.option('--player-level', default=1, show_default=True, help='Player level the regions are described for')
+@click.option('--workers', default=None, type=int, help='Worker processes  [default: CPU count]')
+@click.option('--batch-size', default=200, show_default=True, help='Regions inserted per commit')
+@with_appcontext
+def generate_regions(count, themes, difficulty, player_level, workers, batch_size):
+    """Generate procedural regions in bulk across a process pool"""
+    from app import db, region_maps
+    from models.world import Region, Location
+    from services.world_gen import THEME_TILES
+
+    themes = list(themes) or list(THEME_TILES)
+    workers = workers or os.cpu_count() or 1
+    jobs = [(themes[i % len(themes)], difficulty, player_level) for i in range(count)]
+
+    generated = 0
+    locations = 0
+    insert_time = 0.0
+    batch = []
+
+    def insert_batch():
+        """Bulk insert a batch of regions, then their landmarks, with one executemany each"""
+        nonlocal locations, insert_time
+        started = time.perf_counter()
+
+        # Ids are assigned up front so the landmarks can reference them without a round trip per region
+        region_ids = _reserve_ids(db, Region, len(batch))
+
+        regions = []
+        for index, region_data in enumerate(batch):
+            region = Region(
+                id=region_ids[index] if region_ids else None,
+                name=region_data['name'],
+                description=region_data['description'],
+                theme=region_data['theme'],
+                difficulty=region_data['difficulty'],
+                seed=region_data['seed']
+            )
+            # Works out the map columns the same way the game does
+            region_maps.assign(region, region_data)
+            regions.append(region)
+
+        if region_ids:
+            db.session.bulk_insert_mappings(Region, [
+                {column.key: getattr(region, column.key) for column in Region.__table__.columns}
+                for region in regions
+            ])
+        else:
+            # No safe way to reserve ids on this backend; let the database assign them row by row
+            db.session.add_all(regions)
+            db.session.flush()
+            region_ids = [region.id for region in regions]
+
+        rows = [
+            {
+                'region_id': region_id,
+                'name': landmark['name'],
+                'description': landmark['description'],
+                'location_type': landmark['type'],
+                'x_coord': landmark['x'],
+                'y_coord': landmark['y']
+            }
+            for region_id, region_data in zip(region_ids, batch)
+            for landmark in region_data['landmarks']
+        ]
+        db.session.bulk_insert_mappings(Location, rows)
+        db.session.commit()
+
+        locations += len(rows)
+        insert_time += time.perf_counter() - started
+        batch.clear()
+
+    # Workers are spawned rather than forked, so they don't inherit the app's pooled
+    # connections and threads; drop the connections anyway so none cross the process boundary
+    db.engine.dispose()
+
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_region_worker,
+                             mp_context=multiprocessing.get_context('spawn')) as executor:
+        chunksize = max(1, count // (workers * 4))
+        for region_data in executor.map(_generate_region_job, jobs, chunksize=chunksize):
+            batch.append(region_data)
+            generated += 1
+            if len(batch) >= batch_size:
+                insert_batch()
+        if batch:
+            insert_batch()
+    elapsed = time.perf_counter() - started
+
+    rate = generated / elapsed if elapsed > 0 else 0.0
+    click.echo(f"Generated {generated} regions and {locations} locations in {elapsed:.2f}s "
+               f"({rate:.1f} regions/s, {insert_time:.2f}s inserting)")
+
+def register_commands(app):
+    """Attach the maintenance commands to the app's CLI"""
+    app.cli.add_command(convert_region_maps)
+    app.cli.add_command(regenerate_region_maps)
+    app.cli.add_command(generate_regions)
@@ -12,6 +12,108 @@ SQLALCHEMY_TRACK_MODIFICATIONS = False
 # OpenAI API configuration
 OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY') or 'your_openai_api_key_here'
 
+# Point LLMService at the local stub server (python -m services.llm_stub) for offline load testing
+LLM_USE_STUB = os.environ.get('LLM_USE_STUB') == '1'
+LLM_STUB_URL = os.environ.get('LLM_STUB_URL') or 'http://127.0.0.1:5055/v1'
+
+# LLM response cache configuration
+LLM_CACHE_ENABLED = True
+LLM_CACHE_PATH = os.environ.get('LLM_CACHE_PATH') or 'llm_cache.db'  # Set to '' to disable the SQLite tier
+LLM_CACHE_MAX_ENTRIES = 512  # In-memory LRU size
+LLM_CACHE_MAX_PERSISTENT_ENTRIES = 10000  # SQLite table size bound
+LLM_CACHE_TTLS = {  # Seconds; 0 disables caching for that kind
+    'region': 24 * 60 * 60,
+    'quest': 60 * 60,
+    'enemy': 6 * 60 * 60,
+    'item': 6 * 60 * 60,
+    'dialogue': 5 * 60
+}
+
+# LLM client configuration
+# 'pooled' runs completions on a bounded pool with keep-alive; the request still waits for the result,
+# but can give up at its deadline. 'sync' runs completions in the request thread
+LLM_CLIENT_MODE = os.environ.get('LLM_CLIENT_MODE') or 'pooled'
+LLM_MAX_WORKERS = 16  # Bounded worker pool size (also the keep-alive connection pool size)
+LLM_REQUEST_TIMEOUT = 30  # Seconds, upper bound for any single completion
+LLM_MAX_RETRIES = 1  # Retries for transient errors, only while the deadline allows
+LLM_DEADLINES = {  # Per-kind call deadlines in seconds
+    'region': 20,
+    'quest': 15,
+    'enemy': 10,
+    'item': 10,
+    'dialogue': 8,
+    'text': 10,
+    'summary': 15
+}
+LLM_VARY_SHARED_RESULTS = True  # Jitter enemy stats when one completion is shared by several callers
+
+# Model routing: each kind runs on a tier, escalating to a stronger tier only when output fails validation
+LLM_MODEL_TIERS = {
+    'fast': os.environ.get('LLM_FAST_MODEL') or 'gpt-3.5-turbo',
+    'premium': os.environ.get('LLM_PREMIUM_MODEL') or 'gpt-4'
+}
+LLM_MODEL_ROUTES = {  # max_tokens overrides the call site's default
+    'region': {'tier': 'fast', 'max_tokens': 800, 'escalate_to': 'premium'},
+    'quest': {'tier': 'fast', 'max_tokens': 800, 'escalate_to': 'premium'},
+    'enemy': {'tier': 'fast', 'max_tokens': 600, 'escalate_to': 'premium'},
+    'item': {'tier': 'fast', 'max_tokens': 400, 'escalate_to': 'premium'},
+    'dialogue': {'tier': 'premium', 'max_tokens': 400},
+    'text': {'tier': 'premium', 'max_tokens': 300},
+    'summary': {'tier': 'fast', 'max_tokens': 240}
+}
+
+# Circuit breakers (one per LLMService kind) and hedging
+LLM_BREAKER_SETTINGS = {
+    'window': 50,  # Rolling window of recent calls
+    'min_calls': 10,  # Calls needed in the window before the breaker can trip
+    'error_threshold': 0.5,  # Trip when this share of calls failed
+    'p95_latency_threshold': 12,  # Seconds; trip when p95 latency reaches this
+    'open_seconds': 30,  # Serve fallbacks this long before probing again
+    'half_open_trials': 2  # Successful probe calls needed to close again
+}
+LLM_HEDGE_DEADLINES = {  # Seconds before serving the procedural fallback (pooled mode only)
+    'region': 6,
+    'quest': 5,
+    'enemy': 3,
+    'item': 3,
+    'dialogue': 4
+}
+
+# LLM instrumentation
+LLM_METRICS_LOG_INTERVAL = 300  # Seconds between metrics summaries in the log; 0 disables them
+
+# Background pre-generation (warm pool) configuration
+WARM_POOL_SIZE = 2  # Ready payloads kept per parameter combination; 0 disables the pool
+WARM_POOL_LEVEL_BAND = 5  # Player levels grouped per band (1-5, 6-10, ...)
+WARM_POOL_WORKERS = 2  # Background refill threads
+WARM_POOL_MAX_KEYS = 64  # Least recently requested combinations are dropped beyond this
+
+# NPC conversation memory configuration
+NPC_MEMORY_SUMMARIZE_EVERY = 6  # Fold this many older turns into the rolling summary at a time
+NPC_MEMORY_RECENT_TURNS = 4  # Turns always kept verbatim for the prompt
+NPC_MEMORY_HISTORY_TOKEN_BUDGET = 300  # Hard cap on prompt tokens for summary + recent turns
+NPC_MEMORY_SUMMARY_MAX_WORDS = 120
+
+# Stock NPC lines served instantly when there is no conversation to respond to
+DIALOGUE_POOL_VARIANTS = 4  # Lines kept per (NPC, intent, relationship status); 0 disables the pool
+DIALOGUE_POOL_MAX_USES = 6  # A line is retired and replaced after this many serves
+DIALOGUE_POOL_INTENTS = ['greeting', 'general', 'trade', 'quest']
+DIALOGUE_POOL_MAX_KEYS = 512  # Least recently requested keys are dropped beyond this
+DIALOGUE_POOL_WORKERS = 1  # Background refill threads
+
+# Chunked regions: terrain beyond a region's stored map is generated per chunk from its seed
+REGION_CHUNK_SIZE = 32  # Tiles per chunk side
+REGION_CHUNK_CACHE_SIZE = 256  # Chunks kept in memory across all regions (LRU)
+REGION_VIEWPORT_MAX_SIZE = 128  # Largest viewport side served in one request
+
+# Procedural regions are stored as seed + generator version and their tiles regenerated on demand
+REGION_STORE_PROCEDURAL_MAPS = False  # True stores every map's tiles, as LLM-generated maps always are
+REGION_MAP_CACHE_SIZE = 64  # Regenerated region maps kept in memory (LRU)
+
+# Precomputed navigation (cost grid, distance fields to Locations, flow fields) for server-side movement
+NAV_CACHE_REGIONS = 32  # Regions whose navigation data is kept in memory (LRU)
+NAV_FLOW_FIELDS_PER_REGION = 64  # Flow fields kept per region (LRU)
+
 # External APIs
 WEATHER_API_KEY = os.environ.get('WEATHER_API_KEY') or 'your_weather_api_key_here'
 
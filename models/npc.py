@@ -174,4 +174,51 @@ class NPCDialogue(db.Model):
             'next_dialogue_id': self.next_dialogue_id,
             'quest_id': self.quest_id,
             'relationship_change': self.relationship_change
-        }
\ No newline at end of file
+        }
+
+class NPCConversationMemory(db.Model):
+    """Server-side rolling memory of a character's conversations with an NPC"""
+    id = db.Column(db.Integer, primary_key=True)
+    character_id = db.Column(db.Integer, db.ForeignKey('character.id'), nullable=False)
+    npc_id = db.Column(db.Integer, db.ForeignKey('npc.id'), nullable=False)
+    summary = db.Column(db.Text)  # Compact summary of everything older than recent_turns
+    recent_turns = db.Column(db.Text)  # JSON array of turns not yet folded into the summary
+    turn_count = db.Column(db.Integer, default=0)  # Total turns ever recorded
+    summarized_through = db.Column(db.Integer, default=0)  # Last turn number folded into the summary
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (db.UniqueConstraint('character_id', 'npc_id', name='uq_conversation_memory'),)
+    
+    def __repr__(self):
+        return f"<NPCConversationMemory: Character {self.character_id} - NPC {self.npc_id}>"
+    
+    def get_turns(self):
+        """Get the stored turns, oldest first"""
+        return json.loads(self.recent_turns) if self.recent_turns else []
+    
+    def add_turn(self, speaker, text, max_turns):
+        """Append a turn, keeping at most max_turns unsummarized entries"""
+        turns = self.get_turns()
+        self.turn_count = (self.turn_count or 0) + 1
+        turns.append({
+            'turn': self.turn_count,
+            'speaker': speaker,
+            'text': text,
+            'timestamp': datetime.utcnow().isoformat()
+        })
+        self.recent_turns = json.dumps(turns[-max_turns:])
+        self.updated_at = datetime.utcnow()
+        return self.turn_count
+    
+    def to_dict(self):
+        """Convert conversation memory to dictionary"""
+        return {
+            'id': self.id,
+            'character_id': self.character_id,
+            'npc_id': self.npc_id,
+            'summary': self.summary,
+            'recent_turns': self.get_turns(),
+            'turn_count': self.turn_count,
+            'summarized_through': self.summarized_through,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
@@ -0,0 +1,100 @@
+"""Eager-loading and aggregate queries for pages that list a character's progress and regions.
+
+Each helper loads everything its page touches in a fixed number of queries,
+however many regions, quests or steps the character has.
+"""
+from sqlalchemy import func
+from sqlalchemy.orm import defer, joinedload
+
+from app import db
+from models.world import Region, Location, WorldState
+from models.npc import NPC
+from models.quest import Quest, QuestProgress
+
+def discovered_world_states(character_id):
+    """A character's discovered world states with their regions (one query)"""
+    return WorldState.query.options(
+        joinedload(WorldState.region)
+    ).filter_by(
+        character_id=character_id,
+        discovered=True
+    ).order_by(WorldState.id).all()
+
+def quest_journal(character_id):
+    """A character's quest progress with each quest, its region and its steps
+    (one joined query plus one for steps and one for reward items)"""
+    return QuestProgress.query.options(
+        joinedload(QuestProgress.quest).joinedload(Quest.region),
+        joinedload(QuestProgress.quest).selectinload(Quest.steps)
+    ).filter_by(character_id=character_id).order_by(QuestProgress.id).all()
+
+def npc_quests_with_progress(npc_id, character_id):
+    """An NPC's quests paired with the character's progress on each (None if not started), in two queries"""
+    quests = Quest.query.filter_by(giver_id=npc_id).all()
+    if not quests:
+        return []
+
+    progress_by_quest = {}
+    for progress in QuestProgress.query.filter(
+        QuestProgress.character_id == character_id,
+        QuestProgress.quest_id.in_([quest.id for quest in quests])
+    ).order_by(QuestProgress.id):
+        progress_by_quest.setdefault(progress.quest_id, progress)
+
+    return [(quest, progress_by_quest.get(quest.id)) for quest in quests]
+
+def discovered_region_ids(character_id):
+    """Ids of the regions a character has discovered, in id order (one query)"""
+    rows = db.session.query(WorldState.region_id).filter_by(
+        character_id=character_id,
+        discovered=True
+    ).distinct().order_by(WorldState.region_id).all()
+    return [region_id for region_id, in rows]
+
+def region_counts(region_ids):
+    """Location, NPC and quest counts per region from grouped aggregates, in one query"""
+    if not region_ids:
+        return {}
+
+    def grouped(model):
+        """Rows per region_id of one model, as a subquery"""
+        return db.session.query(
+            model.region_id.label('region_id'),
+            func.count(model.id).label('count')
+        ).filter(model.region_id.in_(region_ids)).group_by(model.region_id).subquery()
+
+    locations = grouped(Location)
+    npcs = grouped(NPC)
+    quests = grouped(Quest)
+
+    rows = (
+        db.session.query(
+            Region.id,
+            func.coalesce(locations.c.count, 0),
+            func.coalesce(npcs.c.count, 0),
+            func.coalesce(quests.c.count, 0)
+        )
+        .outerjoin(locations, locations.c.region_id == Region.id)
+        .outerjoin(npcs, npcs.c.region_id == Region.id)
+        .outerjoin(quests, quests.c.region_id == Region.id)
+        .filter(Region.id.in_(region_ids))
+        .all()
+    )
+
+    return {
+        region_id: {'location_count': location_count, 'npc_count': npc_count, 'quest_count': quest_count}
+        for region_id, location_count, npc_count, quest_count in rows
+    }
+
+def region_summaries(region_ids, include_map=False):
+    """Serialized regions for listings: counts from region_counts and, unless include_map,
+    no map columns loaded or decoded (two queries)"""
+    if not region_ids:
+        return []
+
+    query = Region.query.filter(Region.id.in_(region_ids)).order_by(Region.id)
+    if not include_map:
+        query = query.options(defer(Region.map_data), defer(Region.map_blob))
+
+    counts = region_counts(region_ids)
+    return [region.to_dict(include_map=include_map, counts=counts.get(region.id)) for region in query.all()]
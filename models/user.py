@@ -12,6 +12,7 @@ class User(db.Model, UserMixin):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     last_login = db.Column(db.DateTime)
     active_character_id = db.Column(db.Integer, default=None)
+    is_admin = db.Column(db.Boolean, default=False)
     
     # Relationships
     characters = db.relationship('Character', backref='user', lazy=True)
@@ -2,6 +2,8 @@ from app import db
 from datetime import datetime
 import json
 
+from services.tile_codec import encode_map_data, decode_map_data
+
 class Region(db.Model):
     """Game region/map area"""
     id = db.Column(db.Integer, primary_key=True)
@@ -9,26 +11,73 @@ class Region(db.Model):
     description = db.Column(db.Text)
     theme = db.Column(db.String(50))  # forest, desert, mountains, etc.
     difficulty = db.Column(db.Integer, default=1)  # 1-10 scale
-    map_data = db.Column(db.Text)  # JSON string of map tiles
+    map_data = db.Column(db.Text)  # JSON string of map tiles (legacy, or maps the blob format can't hold)
+    map_blob = db.Column(db.LargeBinary)  # Palette + uint8 tile indices, zlib-compressed
+    seed = db.Column(db.Integer)  # Terrain seed for chunks generated beyond map_data
+    generator_version = db.Column(db.Integer)  # Set when the map isn't stored but regenerated from the seed
     
     # Relationships
     locations = db.relationship('Location', backref='region', lazy=True, cascade="all, delete-orphan")
     npcs = db.relationship('NPC', backref='region', lazy=True)
     quests = db.relationship('Quest', backref='region', lazy=True)
     
-    def to_dict(self):
-        """Convert region data to dictionary"""
-        return {
+    def has_stored_map(self):
+        """Check whether the map's tiles are kept in the database"""
+        return bool(self.map_blob or self.map_data)
+    
+    def get_map_data(self):
+        """Get the map as a dict, decoding (or regenerating) it on first access"""
+        decoded = getattr(self, '_decoded_map', None)
+        if decoded is None:
+            if self.map_blob:
+                decoded = decode_map_data(self.map_blob)
+            elif self.map_data:
+                decoded = json.loads(self.map_data)
+            elif self.generator_version is not None:
+                from app import region_maps
+                decoded = region_maps.get_map_data(self)
+            else:
+                decoded = {}
+            self._decoded_map = decoded
+        return decoded
+    
+    def set_map_data(self, map_data):
+        """Store a map, in the compact blob format when it fits"""
+        try:
+            self.map_blob = encode_map_data(map_data)
+            self.map_data = None
+        except ValueError:
+            # Irregular maps (e.g. malformed LLM output) stay as JSON
+            self.map_blob = None
+            self.map_data = json.dumps(map_data)
+        self._decoded_map = map_data
+    
+    def get_seed(self):
+        """Get the terrain seed (regions created before seeding fall back to their id)"""
+        return self.seed if self.seed is not None else self.id
+    
+    def to_dict(self, include_map=True, counts=None):
+        """Convert region data to dictionary; counts (from region_counts) saves loading the relationships"""
+        if counts is None:
+            counts = {
+                'location_count': len(self.locations) if self.locations else 0,
+                'npc_count': len(self.npcs) if self.npcs else 0,
+                'quest_count': len(self.quests) if self.quests else 0
+            }
+        
+        data = {
             'id': self.id,
             'name': self.name,
             'description': self.description,
             'theme': self.theme,
             'difficulty': self.difficulty,
-            'map_data': json.loads(self.map_data) if self.map_data else {},
-            'location_count': len(self.locations) if self.locations else 0,
-            'npc_count': len(self.npcs) if self.npcs else 0,
-            'quest_count': len(self.quests) if self.quests else 0
+            'seed': self.get_seed(),
+            'generator_version': self.generator_version
         }
+        if include_map:
+            data['map_data'] = self.get_map_data()
+        data.update(counts)
+        return data
 
 class Location(db.Model):
     """Points of interest within regions"""
@@ -84,6 +133,9 @@ class WorldState(db.Model):
     region_seed = db.Column(db.Integer)  # Random seed for procedural generation
     region_instance = db.Column(db.Text)  # JSON string of instance-specific data
     
+    # Relationships
+    region = db.relationship('Region', lazy=True)
+    
     def __init__(self, character_id, region_id, discovered=False, discovery_date=None):
         self.character_id = character_id
         self.region_id = region_id
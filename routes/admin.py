@@ -1,6 +1,8 @@
-from flask import Blueprint, render_template, redirect, url_for, request, flash
+from flask import Blueprint, render_template, redirect, url_for, request, flash, jsonify
 from flask_login import login_required, current_user
 
+from app import llm_service, llm_cache, dialogue_pool
+
 # Create the blueprint
 admin_bp = Blueprint('admin', __name__)
 
@@ -15,4 +17,19 @@ def admin_panel():
     
     return render_template('admin/dashboard.html')
 
-# Add more admin routes as needed
\ No newline at end of file
+@admin_bp.route('/admin/llm-metrics')
+@login_required
+def llm_metrics():
+    """Get LLM latency, token, cache and fallback metrics as JSON"""
+    if not current_user.is_admin:
+        return jsonify({'error': 'Admin access required'}), 403
+    
+    return jsonify({
+        'metrics': llm_service.metrics.snapshot(),
+        'breakers': llm_service.get_breaker_stats(),
+        'single_flight': llm_service.single_flight.get_stats(),
+        'cache': llm_cache.get_stats() if llm_cache is not None else None,
+        'dialogue_pool': dialogue_pool.get_stats()
+    })
+
+# Add more admin routes as needed
@@ -1,14 +1,17 @@
 from flask import Blueprint, render_template, jsonify, request, session, redirect, url_for
 from flask_login import current_user, login_required
 import json
+import random
 from datetime import datetime
 
-from app import db, llm_service, world_generator, quest_generator, combat_manager, weather_service
+from app import db, llm_service, world_generator, quest_generator, combat_manager, weather_service, conversation_memory, region_maps, region_navigation, chunk_manager
 from models.character import Character, CharacterAttributes, CharacterInventory, CharacterSkill
 from models.world import Region, Location, WorldState
-from models.quest import Quest, QuestStep, QuestProgress
+from models.quest import Quest, QuestProgress
 from models.npc import NPC, NPCRelationship
 from models.item import Item, ItemTemplate
+from models.queries import discovered_world_states, quest_journal, npc_quests_with_progress
+from services.navigation import BLOCKED_TILES
 
 game_bp = Blueprint('game', __name__, url_prefix='/game')
 
@@ -39,7 +42,8 @@ def game_home():
     return render_template('game/main.html', 
                           character=character,
                           region=current_region,
-                          world_state=current_world_state)
+                          world_state=current_world_state,
+                          blocked_tiles=BLOCKED_TILES)
 
 @game_bp.route('/region_select')
 @login_required
@@ -52,16 +56,10 @@ def region_select():
     
     # Get all regions this character has discovered
     discovered_regions = []
-    world_states = WorldState.query.filter_by(
-        character_id=character.id,
-        discovered=True
-    ).all()
-    
-    for state in world_states:
-        region = Region.query.get(state.region_id)
-        if region:
+    for state in discovered_world_states(character.id):
+        if state.region:
             discovered_regions.append({
-                'region': region,
+                'region': state.region,
                 'world_state': state
             })
     
@@ -86,8 +84,9 @@ def region_select():
                     description=region_data['description'],
                     theme=region_data['theme'],
                     difficulty=region_data['difficulty'],
-                    map_data=json.dumps(map_data['map_data'])
+                    seed=map_data.get('seed') or random.randint(1, 1000000)
                 )
+                region_maps.assign(region, map_data)
                 db.session.add(region)
                 db.session.flush()  # Get ID without committing
                 
@@ -172,16 +171,14 @@ def quests():
     active_quests = []
     completed_quests = []
     
-    quest_progress = QuestProgress.query.filter_by(character_id=character.id).all()
-    
-    for progress in quest_progress:
-        quest = Quest.query.get(progress.quest_id)
+    for progress in quest_journal(character.id):
+        quest = progress.quest
         if quest:
             quest_data = {
                 'quest': quest,
                 'progress': progress,
-                'region': Region.query.get(quest.region_id),
-                'steps': QuestStep.query.filter_by(quest_id=quest.id).order_by(QuestStep.step_order).all()
+                'region': quest.region,
+                'steps': sorted(quest.steps, key=lambda step: step.step_order)
             }
             
             if progress.status == 'completed':
@@ -307,18 +304,14 @@ def npc_interaction(npc_id):
         db.session.commit()
     
     # Get conversation history
-    conversation_history = session.get('conversation_history', {}).get(str(npc.id), [])
+    _, conversation_history = conversation_memory.get_context(character.id, npc.id)
     
     # Get available quests from this NPC
-    available_quests = Quest.query.filter_by(giver_id=npc.id).all()
+    quests_with_progress = npc_quests_with_progress(npc.id, character.id)
+    available_quests = [quest for quest, _ in quests_with_progress]
     active_quests = []
     
-    for quest in available_quests:
-        progress = QuestProgress.query.filter_by(
-            character_id=character.id,
-            quest_id=quest.id
-        ).first()
-        
+    for quest, progress in quests_with_progress:
         if progress and progress.status != 'completed':
             active_quests.append({
                 'quest': quest,
@@ -425,6 +418,10 @@ def move_character():
     if not all([x is not None, y is not None, region_id]):
         return jsonify({"error": "Missing position data"}), 400
     
+    # Positions are whole tiles
+    if not all(isinstance(value, int) and not isinstance(value, bool) for value in (x, y)):
+        return jsonify({"error": "Position must be whole tile coordinates"}), 400
+    
     # Get world state
     world_state = WorldState.query.filter_by(
         character_id=current_user.active_character_id,
@@ -434,6 +431,17 @@ def move_character():
     if not world_state:
         return jsonify({"error": "Region not found"}), 404
     
+    # Reject moves onto walls, water and other impassable tiles (the client blocks the same set)
+    region = world_state.region
+    grid = region_navigation.get_grid(region)
+    if grid.in_bounds(x, y):
+        blocked = not grid.is_passable(x, y)
+    else:
+        # Beyond the stored map the region continues in generated chunks
+        blocked = chunk_manager.get_tile(region, x, y) in BLOCKED_TILES
+    if blocked:
+        return jsonify({"error": "That way is blocked"}), 400
+    
     # Update position
     world_state.position_x = x
     world_state.position_y = y
@@ -0,0 +1,128 @@
+import threading
+from collections import OrderedDict
+
+class ChunkManager:
+    """Serves region tiles as fixed-size chunks generated on demand from (region seed, chunk coordinates).
+
+    Generated chunks live in an in-memory LRU cache and are never written to the
+    database, since the same inputs always rebuild them. A region's map_data is
+    overlaid on the chunks it covers, so the authored starting area stays as it was generated.
+    """
+
+    def __init__(self, world_generator, chunk_size=32, max_chunks=256):
+        """Initialize with the generator that produces chunk terrain"""
+        self.world_generator = world_generator
+        self.chunk_size = chunk_size
+        self.max_chunks = max_chunks
+
+        self._chunks = OrderedDict()  # (region_id, seed, generator_version, chunk_x, chunk_y) -> 2D tile list
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'generated': 0}
+
+    def chunk_coords(self, x, y):
+        """Map a world tile coordinate to its chunk coordinate"""
+        return x // self.chunk_size, y // self.chunk_size
+
+    def get_chunk(self, region, chunk_x, chunk_y):
+        """Get a chunk's tiles, generating them on a cache miss"""
+        # Like RegionMapStore, key by seed and version so a regenerated map never serves old chunks
+        key = (region.id, region.get_seed(), region.generator_version, chunk_x, chunk_y)
+        with self._lock:
+            tiles = self._chunks.get(key)
+            if tiles is not None:
+                self._chunks.move_to_end(key)
+                self.stats['hits'] += 1
+                return tiles
+            self.stats['misses'] += 1
+
+        tiles = self._generate_chunk(region, chunk_x, chunk_y)
+
+        with self._lock:
+            # Another request may have filled it meanwhile; keep the first copy
+            tiles = self._chunks.setdefault(key, tiles)
+            self._chunks.move_to_end(key)
+            while len(self._chunks) > self.max_chunks:
+                self._chunks.popitem(last=False)
+        return tiles
+
+    def get_tile(self, region, x, y):
+        """Get the tile type at a world coordinate"""
+        chunk_x, chunk_y = self.chunk_coords(x, y)
+        tiles = self.get_chunk(region, chunk_x, chunk_y)
+        return tiles[y - chunk_y * self.chunk_size][x - chunk_x * self.chunk_size]
+
+    def get_viewport(self, region, x, y, width, height):
+        """Assemble the tiles of a width x height window whose top-left corner is (x, y)"""
+        size = self.chunk_size
+        first_x, first_y = self.chunk_coords(x, y)
+        last_x, last_y = self.chunk_coords(x + width - 1, y + height - 1)
+
+        rows = [[] for _ in range(height)]
+        for chunk_y in range(first_y, last_y + 1):
+            # Rows of the viewport that fall inside this chunk row
+            top = max(y, chunk_y * size)
+            bottom = min(y + height, (chunk_y + 1) * size)
+            for chunk_x in range(first_x, last_x + 1):
+                tiles = self.get_chunk(region, chunk_x, chunk_y)
+                left = max(x, chunk_x * size) - chunk_x * size
+                right = min(x + width, (chunk_x + 1) * size) - chunk_x * size
+                for world_y in range(top, bottom):
+                    rows[world_y - y].extend(tiles[world_y - chunk_y * size][left:right])
+
+        return {
+            'region_id': region.id,
+            'x': x,
+            'y': y,
+            'width': width,
+            'height': height,
+            'chunk_size': size,
+            'tiles': rows
+        }
+
+    def invalidate(self, region_id):
+        """Drop a region's cached chunks"""
+        with self._lock:
+            for key in [key for key in self._chunks if key[0] == region_id]:
+                del self._chunks[key]
+
+    def get_stats(self):
+        """Get cache counters and the number of cached chunks"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats['cached'] = len(self._chunks)
+            return stats
+
+    def _generate_chunk(self, region, chunk_x, chunk_y):
+        """Generate a chunk from the region seed"""
+        tiles = self.world_generator.generate_chunk(
+            region.get_seed(), region.theme, chunk_x, chunk_y, self.chunk_size
+        )
+        self._overlay_map_data(region, chunk_x, chunk_y, tiles)
+        with self._lock:
+            self.stats['generated'] += 1
+        return tiles
+
+    def _overlay_map_data(self, region, chunk_x, chunk_y, tiles):
+        """Copy the region's stored map_data over the part of the chunk it covers"""
+        # map_data starts at the world origin, so only non-negative chunks can overlap it
+        if chunk_x < 0 or chunk_y < 0:
+            return
+
+        try:
+            base_tiles = region.get_map_data().get('tiles')
+        except (ValueError, AttributeError):
+            return
+        if not isinstance(base_tiles, list):
+            return
+
+        size = self.chunk_size
+        origin_x, origin_y = chunk_x * size, chunk_y * size
+        for row_index in range(size):
+            world_y = origin_y + row_index
+            if world_y >= len(base_tiles):
+                break
+            base_row = base_tiles[world_y]
+            if not isinstance(base_row, list) or origin_x >= len(base_row):
+                continue
+            segment = base_row[origin_x:origin_x + size]
+            tiles[row_index][:len(segment)] = segment
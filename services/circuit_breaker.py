@@ -0,0 +1,118 @@
+import threading
+import time
+from collections import deque
+
+class CircuitOpenError(Exception):
+    """Raised when a call is short-circuited because its breaker is open"""
+    pass
+
+class CircuitBreaker:
+    """Rolling-window circuit breaker tripping on error rate or p95 latency"""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name, window=50, min_calls=10, error_threshold=0.5, p95_latency_threshold=None,
+                 open_seconds=30, half_open_trials=2):
+        """Initialize breaker thresholds; p95_latency_threshold is in seconds (None disables it)"""
+        self.name = name
+        self.window = window
+        self.min_calls = min_calls
+        self.error_threshold = error_threshold
+        self.p95_latency_threshold = p95_latency_threshold
+        self.open_seconds = open_seconds
+        self.half_open_trials = half_open_trials
+
+        self.state = self.CLOSED
+        self._calls = deque(maxlen=window)  # (success, latency) pairs
+        self._opened_at = None
+        self._trials_in_flight = 0
+        self._trial_successes = 0
+        self._lock = threading.Lock()
+
+        self.stats = {'short_circuited': 0, 'opened': 0}
+
+    def allow(self):
+        """Check whether a call may proceed, moving to half-open once the cool-down passes"""
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.open_seconds:
+                    self.stats['short_circuited'] += 1
+                    return False
+                self.state = self.HALF_OPEN
+                self._trials_in_flight = 0
+                self._trial_successes = 0
+
+            if self.state == self.HALF_OPEN:
+                # Only a few probe calls at a time while we find out if the provider recovered
+                if self._trials_in_flight >= self.half_open_trials:
+                    self.stats['short_circuited'] += 1
+                    return False
+                self._trials_in_flight += 1
+
+            return True
+
+    def check(self):
+        """Raise CircuitOpenError if the call is not allowed"""
+        if not self.allow():
+            raise CircuitOpenError(f"Circuit '{self.name}' is open")
+
+    def release(self):
+        """Give back a half-open trial slot for an allowed call that never ran (and so is never recorded)"""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._trials_in_flight = max(0, self._trials_in_flight - 1)
+
+    def record(self, success, latency):
+        """Record a call outcome and latency in seconds"""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._trials_in_flight = max(0, self._trials_in_flight - 1)
+                if not success:
+                    self._trip()
+                    return
+                self._trial_successes += 1
+                if self._trial_successes >= self.half_open_trials:
+                    self.state = self.CLOSED
+                    self._calls.clear()
+                return
+
+            self._calls.append((success, latency))
+
+            if self.state == self.CLOSED and len(self._calls) >= self.min_calls:
+                if self._error_rate() >= self.error_threshold:
+                    self._trip()
+                elif self.p95_latency_threshold and self._p95_latency() >= self.p95_latency_threshold:
+                    self._trip()
+
+    def snapshot(self):
+        """Get the breaker's state and rolling metrics"""
+        with self._lock:
+            return {
+                'state': self.state,
+                'calls': len(self._calls),
+                'error_rate': self._error_rate() if self._calls else 0.0,
+                'p95_latency': self._p95_latency() if self._calls else 0.0,
+                'short_circuited': self.stats['short_circuited'],
+                'opened': self.stats['opened']
+            }
+
+    def _trip(self):
+        """Open the breaker (lock held)"""
+        self.state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._calls.clear()
+        self.stats['opened'] += 1
+        print(f"Circuit '{self.name}' opened; serving fallbacks for {self.open_seconds}s")
+
+    def _error_rate(self):
+        """Share of failed calls in the window (lock held)"""
+        failures = sum(1 for success, _ in self._calls if not success)
+        return failures / len(self._calls)
+
+    def _p95_latency(self):
+        """95th percentile latency in the window (lock held)"""
+        latencies = sorted(latency for _, latency in self._calls)
+        index = min(len(latencies) - 1, int(len(latencies) * 0.95))
+        return latencies[index]
@@ -0,0 +1,82 @@
+import copy
+import random
+
+from services.warm_pool import RefillingPool
+
+class DialogueVariantPool(RefillingPool):
+    """Keeps several generated lines per (NPC, intent, relationship status) and serves one at random.
+
+    The producer must return an independently sampled line on every call (not a
+    cached completion), otherwise every stored variant is the same line. It should
+    raise rather than return a fallback line, so failures are never stored.
+    """
+
+    def __init__(self, variants=4, max_uses=6, intents=None, max_keys=512, workers=1):
+        """Initialize the pool; variants=0 disables it"""
+        super().__init__(variants, max_keys, workers, 'dialogue-pool')
+        self.variants = variants
+        self.max_uses = max_uses
+        self.intents = set(intents or ['greeting', 'general', 'trade', 'quest'])
+        self.stats['retired'] = 0
+
+    def serves(self, intent, conversation_history, summary):
+        """Check whether a request can be answered with a stock line.
+        Only pooled intents qualify, and only to open a conversation: once any turn
+        has been exchanged, the reply has to follow on from it"""
+        if self.variants <= 0 or intent not in self.intents:
+            return False
+        return not conversation_history and not summary
+
+    def take(self, key, producer):
+        """Serve a random stored variant, or produce one inline when the key has none yet"""
+        entry = None
+        with self._lock:
+            self._register_locked(key, producer)
+            pool = self._pools[key]
+            if pool:
+                entry = random.choice(pool)
+                entry['uses'] += 1
+                # Retire overused lines so the pool keeps turning over
+                if entry['uses'] >= self.max_uses:
+                    pool.remove(entry)
+                    self.stats['retired'] += 1
+                self.stats['hits'] += 1
+            else:
+                self.stats['misses'] += 1
+
+        if entry is not None:
+            self._schedule_refill(key)
+            return copy.deepcopy(entry['dialogue'])
+
+        dialogue = self._prepare(producer())
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool is not None and len(pool) < self.variants:
+                pool.append({'dialogue': dialogue, 'uses': 1})
+                self.stats['produced'] += 1
+        self._schedule_refill(key)
+        return copy.deepcopy(dialogue)
+
+    def get_stats(self):
+        """Get hit/miss counters and the number of stored variants"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats['keys'] = len(self._producers)
+            stats['variants'] = sum(len(pool) for pool in self._pools.values())
+            return stats
+
+    @staticmethod
+    def _prepare(dialogue):
+        """Normalize a generated line for reuse"""
+        dialogue = dict(dialogue)
+        # Stock lines are served repeatedly, so they must not move the relationship
+        dialogue['relationship_change'] = 0
+        return dialogue
+
+    def _new_pool(self):
+        """Variants are picked at random, so each key holds a list"""
+        return []
+
+    def _store(self, pool, item):
+        """Store a produced line as an unused variant"""
+        pool.append({'dialogue': self._prepare(item), 'uses': 0})
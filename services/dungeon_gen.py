@@ -0,0 +1,122 @@
+import random
+
+import numpy as np
+
+# Occupancy grid cell values and the tile each one becomes
+WALL, FLOOR, CORRIDOR, DOOR = 0, 1, 2, 3
+TILE_NAMES = ('wall', 'stone', 'corridor', 'door')
+
+class DungeonGenerator:
+    """Binary space partition dungeon generator on a NumPy occupancy grid.
+
+    The map is split recursively into leaves, each leaf gets one room, and sibling
+    subtrees are joined with an L-shaped corridor, so every room is reachable and
+    rooms never overlap. Doors go where a corridor squeezes between walls into a room.
+    """
+
+    def __init__(self, min_leaf_size=8, min_room_size=3, max_room_size=12):
+        """Configure partition and room sizes (leaves need a 1-tile wall margin around the room)"""
+        if min_leaf_size < min_room_size + 2:
+            raise ValueError("min_leaf_size must leave room for a wall on each side of the smallest room")
+        self.min_leaf_size = min_leaf_size
+        self.min_room_size = min_room_size
+        self.max_room_size = max_room_size
+
+    def generate(self, width, height, rng=None, exits=()):
+        """Generate a dungeon; returns (occupancy grid as a (height, width) uint8 array, rooms as (x, y, w, h)).
+        Each (x, y) in exits is joined to its nearest room by a corridor"""
+        rng = rng or random
+        grid = np.full((height, width), WALL, dtype=np.uint8)
+        rooms = []
+        if width >= self.min_leaf_size and height >= self.min_leaf_size:
+            self._partition(grid, rng, 0, 0, width, height, rooms)
+            for exit_point in exits:
+                self._carve_corridor(grid, rng, _center(_nearest_room(rooms, exit_point)), exit_point)
+        self._place_doors(grid)
+        return grid, rooms
+
+    def generate_tiles(self, width, height, rng=None, exits=()):
+        """Generate a dungeon as a list of rows of tile names"""
+        grid, _ = self.generate(width, height, rng, exits)
+        return to_tiles(grid)
+
+    def _partition(self, grid, rng, x, y, width, height, rooms):
+        """Split a leaf or carve its room; returns the rooms in this subtree"""
+        min_leaf = self.min_leaf_size
+        can_split_x = width >= 2 * min_leaf
+        can_split_y = height >= 2 * min_leaf
+
+        if not (can_split_x or can_split_y):
+            room = self._carve_room(grid, rng, x, y, width, height)
+            rooms.append(room)
+            return [room]
+
+        # Split across the longer side so leaves stay roughly square
+        if can_split_x and can_split_y:
+            split_x = width > height if width != height else rng.random() < 0.5
+        else:
+            split_x = can_split_x
+
+        if split_x:
+            cut = rng.randint(min_leaf, width - min_leaf)
+            first = self._partition(grid, rng, x, y, cut, height, rooms)
+            second = self._partition(grid, rng, x + cut, y, width - cut, height, rooms)
+            split_point = (x + cut, y + height // 2)
+        else:
+            cut = rng.randint(min_leaf, height - min_leaf)
+            first = self._partition(grid, rng, x, y, width, cut, rooms)
+            second = self._partition(grid, rng, x, y + cut, width, height - cut, rooms)
+            split_point = (x + width // 2, y + cut)
+
+        # Join the two subtrees through their rooms nearest the split
+        room_a = _nearest_room(first, split_point)
+        room_b = _nearest_room(second, _center(room_a))
+        self._carve_corridor(grid, rng, _center(room_a), _center(room_b))
+        return first + second
+
+    def _carve_room(self, grid, rng, x, y, width, height):
+        """Carve a randomly sized room inside a leaf, keeping a wall margin"""
+        room_width = rng.randint(self.min_room_size, max(self.min_room_size, min(self.max_room_size, width - 2)))
+        room_height = rng.randint(self.min_room_size, max(self.min_room_size, min(self.max_room_size, height - 2)))
+        room_x = rng.randint(x + 1, x + width - room_width - 1)
+        room_y = rng.randint(y + 1, y + height - room_height - 1)
+        grid[room_y:room_y + room_height, room_x:room_x + room_width] = FLOOR
+        return (room_x, room_y, room_width, room_height)
+
+    def _carve_corridor(self, grid, rng, start, end):
+        """Carve an L-shaped corridor through walls only, leaving rooms untouched"""
+        (x1, y1), (x2, y2) = start, end
+        if rng.random() < 0.5:
+            segments = [(y1, min(x1, x2), y1, max(x1, x2)), (min(y1, y2), x2, max(y1, y2), x2)]
+        else:
+            segments = [(min(y1, y2), x1, max(y1, y2), x1), (y2, min(x1, x2), y2, max(x1, x2))]
+
+        for top, left, bottom, right in segments:
+            segment = grid[top:bottom + 1, left:right + 1]
+            segment[segment == WALL] = CORRIDOR
+
+    def _place_doors(self, grid):
+        """Turn corridor tiles into doors where they enter a room between two walls"""
+        padded = np.pad(grid, 1, constant_values=WALL)
+        up = padded[:-2, 1:-1]
+        down = padded[2:, 1:-1]
+        left = padded[1:-1, :-2]
+        right = padded[1:-1, 2:]
+
+        touches_room = (up == FLOOR) | (down == FLOOR) | (left == FLOOR) | (right == FLOOR)
+        in_doorway = ((left == WALL) & (right == WALL)) | ((up == WALL) & (down == WALL))
+        grid[(grid == CORRIDOR) & touches_room & in_doorway] = DOOR
+
+def to_tiles(grid):
+    """Map an occupancy grid to a list of rows of tile names"""
+    return np.asarray(TILE_NAMES, dtype=object)[grid].tolist()
+
+def _center(room):
+    """Center tile of a room"""
+    x, y, width, height = room
+    return (x + width // 2, y + height // 2)
+
+def _nearest_room(rooms, point):
+    """Room whose center is closest (Manhattan) to a point"""
+    px, py = point
+    return min(rooms, key=lambda room: abs(_center(room)[0] - px) + abs(_center(room)[1] - py))
@@ -0,0 +1,164 @@
+import json
+
+class SchemaViolation(ValueError):
+    """Raised when streamed JSON can no longer satisfy its schema"""
+    pass
+
+class JSONStreamExtractor:
+    """Incrementally extracts the first JSON object from a token stream.
+
+    Top-level fields are parsed and type-checked as soon as they complete, so a
+    completion that is going wrong can be abandoned before it finishes.
+    """
+
+    # How many recent top-level commas to try when repairing a truncated object
+    MAX_REPAIR_ATTEMPTS = 4
+
+    def __init__(self, schema=None):
+        """Initialize with an optional schema: {'fields': {name: type(s)}, 'required': [names]}"""
+        self.schema = schema or {}
+        self.fields = {}
+        self.complete = False
+        self.repaired = False  # Set when result() had to drop a truncated tail
+
+        self._buffer = []
+        self._length = 0
+        self._start = None  # Index of the opening brace within the buffer
+        self._text = ''  # Joined object text (rebuilt lazily)
+        self._stack = []  # Open brackets
+        self._in_string = False
+        self._escape = False
+        self._member_start = None  # Start of the current top-level member
+        self._safe_points = []  # Indices of top-level commas, where a truncated object can be cut
+
+    def feed(self, chunk):
+        """Consume a chunk of text; returns True once the object is complete"""
+        if self.complete or not chunk:
+            return self.complete
+
+        for char in chunk:
+            index = self._length
+            self._buffer.append(char)
+            self._length += 1
+
+            if self._start is None:
+                # Skip prose and code fences until the object begins
+                if char == '{':
+                    self._start = index
+                    self._stack.append('{')
+                    self._member_start = index + 1
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if char == '"':
+                self._in_string = True
+            elif char in '{[':
+                self._stack.append(char)
+            elif char in '}]':
+                if not self._stack:
+                    raise SchemaViolation("Unbalanced closing bracket in JSON stream")
+                self._stack.pop()
+                if not self._stack:
+                    # The top-level object just closed
+                    self._finish_member(index)
+                    self.complete = True
+                    return True
+            elif char == ',':
+                if len(self._stack) == 1:
+                    self._safe_points.append(index)
+                    self._finish_member(index)
+                    self._member_start = index + 1
+
+        return self.complete
+
+    def result(self):
+        """Return the parsed object, repairing truncation and validating required fields"""
+        if self._start is None:
+            raise SchemaViolation("No JSON object found in response")
+
+        text = self._object_text()
+        if self.complete:
+            data = json.loads(text)
+        else:
+            data = self._repair(text)
+
+        if not isinstance(data, dict):
+            raise SchemaViolation("Response is not a JSON object")
+
+        for key, value in data.items():
+            self._check_field(key, value)
+
+        missing = [key for key in self.schema.get('required', []) if key not in data]
+        if missing:
+            raise SchemaViolation(f"Missing required fields: {', '.join(missing)}")
+
+        return data
+
+    def _object_text(self):
+        """Join the buffered characters from the opening brace onward"""
+        if len(self._text) != self._length - self._start:
+            self._text = ''.join(self._buffer[self._start:])
+        return self._text
+
+    def _finish_member(self, end_index):
+        """Parse the top-level member that just ended and validate it"""
+        if self._member_start is None:
+            return
+
+        member = ''.join(self._buffer[self._member_start:end_index]).strip()
+        if not member:
+            return
+
+        try:
+            parsed = json.loads('{' + member + '}')
+        except ValueError:
+            # Let the final parse (and repair) decide; a bad member isn't always fatal
+            return
+
+        for key, value in parsed.items():
+            self.fields[key] = value
+            self._check_field(key, value)
+
+    def _check_field(self, key, value):
+        """Raise SchemaViolation if a field has the wrong type"""
+        expected = self.schema.get('fields', {}).get(key)
+        if expected is None:
+            return
+
+        expected = expected if isinstance(expected, tuple) else (expected,)
+        # bool is an int subclass; only accept it where bool is asked for explicitly
+        if isinstance(value, bool) and bool not in expected:
+            raise SchemaViolation(f"Field '{key}' should be {self._type_names(expected)}, got bool")
+        if not isinstance(value, expected):
+            raise SchemaViolation(
+                f"Field '{key}' should be {self._type_names(expected)}, got {type(value).__name__}"
+            )
+
+    @staticmethod
+    def _type_names(types):
+        """Format expected types for error messages"""
+        return ' or '.join(t.__name__ for t in types)
+
+    def _repair(self, text):
+        """Recover a truncated object by cutting it at the last top-level comma.
+
+        The member after that comma may be half-written (a number cut short, a
+        partial string or list), so it is dropped rather than closed as-is.
+        """
+        for index in reversed(self._safe_points[-self.MAX_REPAIR_ATTEMPTS:]):
+            try:
+                data = json.loads(text[:index - self._start] + '}')
+            except ValueError:
+                continue
+            self.repaired = True
+            return data
+
+        raise SchemaViolation("Truncated JSON could not be repaired")
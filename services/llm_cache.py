@@ -0,0 +1,211 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+class LLMResponseCache:
+    """Two-tier cache for LLM responses: in-memory LRU backed by SQLite"""
+
+    def __init__(self, db_path=None, max_entries=512, max_persistent_entries=10000, ttls=None, default_ttl=3600,
+                 access_flush_size=64):
+        """Initialize cache tiers and open the persistent store"""
+        self.max_entries = max_entries
+        self.access_flush_size = access_flush_size
+        self.max_persistent_entries = max_persistent_entries
+        self.ttls = ttls or {}
+        self.default_ttl = default_ttl
+
+        # In-memory tier: fingerprint -> (expires_at, value)
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Persistent hits waiting to have last_access written: fingerprint -> access time
+        self._pending_access = {}
+
+        # Hit/miss counters
+        self.stats = {
+            'memory_hits': 0,
+            'persistent_hits': 0,
+            'misses': 0,
+            'expired': 0,
+            'stores': 0,
+            'evictions': 0
+        }
+
+        # Persistent tier is optional (None disables it)
+        self._conn = None
+        if db_path:
+            try:
+                self._conn = sqlite3.connect(db_path, check_same_thread=False)
+                self._conn.execute(
+                    """CREATE TABLE IF NOT EXISTS llm_cache (
+                        fingerprint TEXT PRIMARY KEY,
+                        kind TEXT,
+                        value TEXT NOT NULL,
+                        expires_at REAL NOT NULL,
+                        last_access REAL NOT NULL
+                    )"""
+                )
+                self._conn.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_llm_cache_access ON llm_cache (last_access)"
+                )
+                self._conn.commit()
+            except sqlite3.Error as e:
+                print(f"Error opening LLM cache database: {e}")
+                self._conn = None
+
+    @staticmethod
+    def fingerprint(system_prompt, prompt, model, temperature, max_tokens=None):
+        """Build a stable key from the normalized prompt and sampling parameters"""
+        # Collapse whitespace so indentation changes in prompt templates don't bust the cache
+        normalized = [
+            re.sub(r'\s+', ' ', system_prompt or '').strip(),
+            re.sub(r'\s+', ' ', prompt or '').strip(),
+            model,
+            round(float(temperature), 3),
+            max_tokens
+        ]
+        payload = json.dumps(normalized, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def ttl_for(self, kind):
+        """Get the time-to-live in seconds for a generation kind"""
+        return self.ttls.get(kind, self.default_ttl)
+
+    def get(self, kind, key):
+        """Look up a cached value, checking memory first and then SQLite"""
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.stats['memory_hits'] += 1
+                    return value
+                # Expired in memory
+                del self._memory[key]
+                self.stats['expired'] += 1
+
+            if self._conn is None:
+                self.stats['misses'] += 1
+                return None
+
+            try:
+                row = self._conn.execute(
+                    "SELECT value, expires_at FROM llm_cache WHERE fingerprint = ?", (key,)
+                ).fetchone()
+
+                if row is None:
+                    self.stats['misses'] += 1
+                    return None
+
+                value, expires_at = row
+                if expires_at <= now:
+                    self._conn.execute("DELETE FROM llm_cache WHERE fingerprint = ?", (key,))
+                    self._conn.commit()
+                    self.stats['expired'] += 1
+                    self.stats['misses'] += 1
+                    return None
+
+                # Access times are written in batches so reads don't each wait on a commit
+                self._pending_access[key] = now
+                if len(self._pending_access) >= self.access_flush_size:
+                    self._flush_access()
+                    self._conn.commit()
+            except sqlite3.Error as e:
+                print(f"Error reading LLM cache: {e}")
+                self.stats['misses'] += 1
+                return None
+
+            # Promote to the memory tier
+            self._store_memory(key, expires_at, value)
+            self.stats['persistent_hits'] += 1
+            return value
+
+    def set(self, kind, key, value):
+        """Store a value in both tiers using the TTL for its kind"""
+        ttl = self.ttl_for(kind)
+        if not ttl or ttl <= 0:
+            return
+
+        now = time.time()
+        expires_at = now + ttl
+
+        with self._lock:
+            self._store_memory(key, expires_at, value)
+            self.stats['stores'] += 1
+
+            if self._conn is None:
+                return
+
+            try:
+                self._conn.execute(
+                    """INSERT OR REPLACE INTO llm_cache (fingerprint, kind, value, expires_at, last_access)
+                       VALUES (?, ?, ?, ?, ?)""",
+                    (key, kind, value, expires_at, now)
+                )
+                self._pending_access.pop(key, None)
+                self._flush_access()
+                self._evict_persistent(now)
+                self._conn.commit()
+            except sqlite3.Error as e:
+                print(f"Error writing LLM cache: {e}")
+
+    def clear(self):
+        """Remove every entry from both tiers"""
+        with self._lock:
+            self._memory.clear()
+            self._pending_access.clear()
+            if self._conn is not None:
+                try:
+                    self._conn.execute("DELETE FROM llm_cache")
+                    self._conn.commit()
+                except sqlite3.Error as e:
+                    print(f"Error clearing LLM cache: {e}")
+
+    def get_stats(self):
+        """Get hit/miss counters and tier sizes"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats['memory_entries'] = len(self._memory)
+            hits = stats['memory_hits'] + stats['persistent_hits']
+            lookups = hits + stats['misses']
+            stats['hit_rate'] = hits / lookups if lookups else 0.0
+            return stats
+
+    def _store_memory(self, key, expires_at, value):
+        """Insert into the LRU tier, evicting the least recently used entries (lock held)"""
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.stats['evictions'] += 1
+
+    def _flush_access(self):
+        """Write batched last_access times before they feed LRU eviction (lock held, caller commits)"""
+        if not self._pending_access:
+            return
+        self._conn.executemany(
+            "UPDATE llm_cache SET last_access = ? WHERE fingerprint = ?",
+            [(accessed, key) for key, accessed in self._pending_access.items()]
+        )
+        self._pending_access.clear()
+
+    def _evict_persistent(self, now):
+        """Drop expired rows and trim the table to its size bound (lock held)"""
+        self._conn.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (now,))
+        count = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        overflow = count - self.max_persistent_entries
+        if overflow > 0:
+            self._conn.execute(
+                """DELETE FROM llm_cache WHERE fingerprint IN (
+                       SELECT fingerprint FROM llm_cache ORDER BY last_access ASC LIMIT ?
+                   )""",
+                (overflow,)
+            )
+            self.stats['evictions'] += overflow
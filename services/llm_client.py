@@ -0,0 +1,150 @@
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+import openai
+import requests
+from requests.adapters import HTTPAdapter
+
+# Errors worth retrying while the call deadline allows it
+RETRYABLE_ERRORS = (
+    openai.error.Timeout,
+    openai.error.APIConnectionError,
+    openai.error.RateLimitError,
+    openai.error.ServiceUnavailableError
+)
+
+class CallCancelledError(FutureTimeoutError):
+    """Raised when a call's deadline passed before its job even started; the job will never run"""
+    pass
+
+class LLMClient:
+    """Runs OpenAI completions either inline or on a bounded worker pool.
+
+    The pool bounds concurrent API calls, shares keep-alive connections and enforces
+    per-call deadlines. Request handlers still wait for their result through call(),
+    so a handler's worker stays busy for the length of its LLM call; what the pool
+    adds is that a caller can stop waiting at a deadline while the completion
+    finishes in the background (LLMService hedging relies on this to fill the cache).
+    """
+
+    def __init__(self, mode='sync', max_workers=8, pool_size=None, request_timeout=30, max_retries=1):
+        """Initialize the client; mode is 'sync' (inline) or 'pooled' (thread pool + keep-alive)"""
+        self.mode = mode
+        self.pooled = mode == 'pooled'
+        self.max_workers = max_workers
+        self.request_timeout = request_timeout
+        self.max_retries = max_retries
+        self.executor = None
+        self.session = None
+
+        # Marks threads owned by our pool so nested calls run inline instead of deadlocking
+        self._local = threading.local()
+
+        if self.pooled:
+            # Share one keep-alive connection pool across all worker threads
+            pool_size = pool_size or max_workers
+            self.session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            self.session.mount('https://', adapter)
+            self.session.mount('http://', adapter)
+            openai.requestssession = self.session
+
+            self.executor = ThreadPoolExecutor(
+                max_workers=max_workers,
+                thread_name_prefix='llm-worker',
+                initializer=self._mark_worker_thread
+            )
+
+    def _mark_worker_thread(self):
+        """Flag the current thread as a pool worker"""
+        self._local.is_worker = True
+
+    def in_worker(self):
+        """Check whether the caller is already running on the pool"""
+        return getattr(self._local, 'is_worker', False)
+
+    def create_completion(self, deadline=None, stats=None, **kwargs):
+        """Call ChatCompletion.create, retrying transient errors until the deadline.
+        If a stats dict is given, the retry count is recorded in it"""
+        deadline = deadline or (time.monotonic() + self.request_timeout)
+        attempt = 0
+
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise openai.error.Timeout("LLM call deadline exceeded")
+
+            try:
+                return openai.ChatCompletion.create(
+                    request_timeout=min(self.request_timeout, remaining),
+                    **kwargs
+                )
+            except RETRYABLE_ERRORS:
+                attempt += 1
+                if attempt > self.max_retries:
+                    raise
+                if stats is not None:
+                    stats['retries'] = attempt
+                # Short backoff, but never past the deadline
+                time.sleep(min(0.5 * attempt, max(0, deadline - time.monotonic())))
+
+    def _submit(self, fn, *args, **kwargs):
+        """Schedule fn on the worker pool and return a Future"""
+        if self.pooled and not self.in_worker():
+            return self.executor.submit(fn, *args, **kwargs)
+
+        # Sync mode (or nested call): run inline and hand back a completed Future
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def call(self, fn, *args, timeout=None, **kwargs):
+        """Run fn and wait for its result, raising FutureTimeoutError after timeout seconds"""
+        timeout = timeout or self.request_timeout
+        future = self._submit(fn, *args, **kwargs)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            if future.cancel():
+                # Still queued, so it is dropped without ever running
+                raise CallCancelledError(f"LLM call still queued after {timeout}s")
+            # The request keeps running in its worker, but nobody is waiting on it now
+            raise FutureTimeoutError(f"No LLM result within {timeout}s")
+
+    def complete(self, timeout=None, **kwargs):
+        """Run a chat completion with a per-call deadline"""
+        timeout = timeout or self.request_timeout
+        deadline = time.monotonic() + timeout
+        return self.call(self.create_completion, deadline=deadline, timeout=timeout, **kwargs)
+
+    def stream(self, timeout=None, stats=None, **kwargs):
+        """Stream a chat completion in the calling thread, yielding content deltas until the deadline.
+        If a stats dict is given, retries, time-to-first-token and streamed tokens are recorded in it"""
+        timeout = timeout or self.request_timeout
+        started = time.monotonic()
+        deadline = started + timeout
+        response = self.create_completion(deadline=deadline, stats=stats, stream=True, **kwargs)
+
+        for chunk in response:
+            if time.monotonic() > deadline:
+                raise openai.error.Timeout("LLM stream deadline exceeded")
+
+            delta = chunk.choices[0].get('delta', {}).get('content')
+            if delta:
+                if stats is not None:
+                    if 'ttft' not in stats:
+                        stats['ttft'] = time.monotonic() - started
+                    # The API streams roughly one token per chunk
+                    stats['completion_tokens'] = stats.get('completion_tokens', 0) + 1
+                yield delta
+
+    def shutdown(self, wait=False):
+        """Stop the worker pool and close pooled connections"""
+        if self.executor is not None:
+            self.executor.shutdown(wait=wait)
+        if self.session is not None:
+            self.session.close()
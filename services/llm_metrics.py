@@ -0,0 +1,255 @@
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from services.circuit_breaker import CircuitOpenError
+
+# Histogram bucket upper bounds
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 4, 8, 16, 32)  # Seconds
+TOKEN_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048)
+
+class Histogram:
+    """Fixed-bucket histogram with count, sum, min and max"""
+
+    def __init__(self, bounds):
+        """Initialize with ascending bucket upper bounds (one overflow bucket is added)"""
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def observe(self, value):
+        """Add a value"""
+        index = len(self.bounds)
+        for i, bound in enumerate(self.bounds):
+            if value <= bound:
+                index = i
+                break
+        self.counts[index] += 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def percentile(self, q):
+        """Estimate a percentile (0-100) as the upper bound of the bucket it falls in"""
+        if not self.count:
+            return None
+        rank = q / 100 * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank and bucket_count:
+                return min(self.bounds[i], self.max) if i < len(self.bounds) else self.max
+        return self.max
+
+    def snapshot(self):
+        """Get summary statistics and bucket counts"""
+        buckets = {f"<={bound}": count for bound, count in zip(self.bounds, self.counts)}
+        buckets[f">{self.bounds[-1]}"] = self.counts[-1]
+        return {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else None,
+            'min': self.min,
+            'max': self.max,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99),
+            'buckets': buckets
+        }
+
+class _CallStats:
+    """Counters and histograms for one (kind, model) pair"""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.parse_failures = 0
+        self.timeouts = 0
+        self.retries = 0
+        self.wall_time = Histogram(LATENCY_BUCKETS)
+        self.ttft = Histogram(LATENCY_BUCKETS)
+        self.prompt_tokens = Histogram(TOKEN_BUCKETS)
+        self.completion_tokens = Histogram(TOKEN_BUCKETS)
+
+    def snapshot(self):
+        """Get the pair's metrics as a dict"""
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'parse_failures': self.parse_failures,
+            'timeouts': self.timeouts,
+            'retries': self.retries,
+            'wall_time': self.wall_time.snapshot(),
+            'ttft': self.ttft.snapshot(),
+            'prompt_tokens': self.prompt_tokens.snapshot(),
+            'completion_tokens': self.completion_tokens.snapshot()
+        }
+
+class LLMMetrics:
+    """In-process metrics for LLM calls: latency, tokens, cache status and fallbacks"""
+
+    def __init__(self):
+        """Initialize empty metrics"""
+        self.started_at = time.time()
+        self._calls = {}  # (kind, model) -> _CallStats
+        self._requests = {}  # kind -> requests served (LLM, cache or fallback)
+        self._cache = {}  # kind -> {'hits': n, 'misses': n}
+        self._fallbacks = {}  # kind -> {reason: n}
+        self._escalations = {}  # kind -> {'from_model->to_model': n}
+        self._lock = threading.Lock()
+        self._log_thread = None
+
+    @staticmethod
+    def classify_error(error):
+        """Map an exception to a short outcome label"""
+        if isinstance(error, CircuitOpenError):
+            return 'circuit_open'
+        if isinstance(error, (FutureTimeoutError, TimeoutError)) or 'Timeout' in type(error).__name__:
+            return 'timeout'
+        if isinstance(error, ValueError):
+            # json.JSONDecodeError and SchemaViolation are both ValueErrors
+            return 'parse_error'
+        return 'error'
+
+    def record_request(self, kind):
+        """Count a request for a kind, however it ends up being served"""
+        with self._lock:
+            self._requests[kind] = self._requests.get(kind, 0) + 1
+
+    def record_cache(self, kind, hit):
+        """Count a cache hit or miss"""
+        with self._lock:
+            counts = self._cache.setdefault(kind, {'hits': 0, 'misses': 0})
+            counts['hits' if hit else 'misses'] += 1
+
+    def record_call(self, kind, model, wall_time, stats=None, error=None):
+        """Record one provider call; stats may hold ttft, prompt_tokens, completion_tokens and retries"""
+        stats = stats or {}
+        with self._lock:
+            call_stats = self._calls.get((kind, model))
+            if call_stats is None:
+                call_stats = self._calls[(kind, model)] = _CallStats()
+
+            call_stats.calls += 1
+            call_stats.retries += stats.get('retries', 0)
+            call_stats.wall_time.observe(wall_time)
+            if stats.get('ttft') is not None:
+                call_stats.ttft.observe(stats['ttft'])
+            if stats.get('prompt_tokens'):
+                call_stats.prompt_tokens.observe(stats['prompt_tokens'])
+            if stats.get('completion_tokens'):
+                call_stats.completion_tokens.observe(stats['completion_tokens'])
+
+            if error is not None:
+                outcome = self.classify_error(error)
+                if outcome == 'parse_error':
+                    call_stats.parse_failures += 1
+                elif outcome == 'timeout':
+                    call_stats.timeouts += 1
+                else:
+                    call_stats.errors += 1
+
+    def record_escalation(self, kind, from_model, to_model):
+        """Count a retry on a stronger model after the routed model's output failed validation"""
+        with self._lock:
+            paths = self._escalations.setdefault(kind, {})
+            path = f"{from_model}->{to_model}"
+            paths[path] = paths.get(path, 0) + 1
+
+    def record_fallback(self, kind, error=None):
+        """Count a request answered by procedural fallback, labelled by what went wrong"""
+        reason = self.classify_error(error) if error is not None else 'empty'
+        with self._lock:
+            reasons = self._fallbacks.setdefault(kind, {})
+            reasons[reason] = reasons.get(reason, 0) + 1
+
+    def snapshot(self):
+        """Get all metrics as a JSON-serializable dict"""
+        with self._lock:
+            fallbacks = {}
+            for kind, reasons in self._fallbacks.items():
+                total = sum(reasons.values())
+                requests = self._requests.get(kind, 0)
+                fallbacks[kind] = {
+                    'total': total,
+                    'rate': total / requests if requests else None,
+                    'reasons': dict(reasons)
+                }
+
+            escalations = {}
+            for kind, paths in self._escalations.items():
+                total = sum(paths.values())
+                requests = self._requests.get(kind, 0)
+                escalations[kind] = {
+                    'total': total,
+                    'rate': total / requests if requests else None,
+                    'paths': dict(paths)
+                }
+
+            cache = {}
+            for kind, counts in self._cache.items():
+                lookups = counts['hits'] + counts['misses']
+                cache[kind] = dict(counts, hit_rate=counts['hits'] / lookups if lookups else 0.0)
+
+            return {
+                'uptime': time.time() - self.started_at,
+                'requests': dict(self._requests),
+                'calls': {f"{kind}:{model}": stats.snapshot() for (kind, model), stats in self._calls.items()},
+                'cache': cache,
+                'escalations': escalations,
+                'fallbacks': fallbacks
+            }
+
+    def format_summary(self):
+        """Format a compact multi-line summary for the log"""
+        snapshot = self.snapshot()
+        lines = [f"LLM metrics ({int(snapshot['uptime'])}s uptime)"]
+
+        for name, stats in sorted(snapshot['calls'].items()):
+            wall_time = stats['wall_time']
+            ttft = stats['ttft']
+            lines.append(
+                f"  {name}: calls={stats['calls']} p50={self._round(wall_time['p50'], 2)}s "
+                f"p95={self._round(wall_time['p95'], 2)}s ttft_p95={self._round(ttft['p95'], 2)}s prompt_tokens_avg={self._round(stats['prompt_tokens']['mean'])} "
+                f"completion_tokens_avg={self._round(stats['completion_tokens']['mean'])} "
+                f"errors={stats['errors']} timeouts={stats['timeouts']} "
+                f"parse_failures={stats['parse_failures']} retries={stats['retries']}"
+            )
+
+        for kind, counts in sorted(snapshot['cache'].items()):
+            lines.append(f"  cache {kind}: hits={counts['hits']} misses={counts['misses']} "
+                         f"hit_rate={counts['hit_rate']:.2f}")
+
+        for kind, escalation in sorted(snapshot['escalations'].items()):
+            rate = f"{escalation['rate']:.2f}" if escalation['rate'] is not None else 'n/a'
+            lines.append(f"  escalations {kind}: total={escalation['total']} rate={rate} paths={escalation['paths']}")
+
+        for kind, fallback in sorted(snapshot['fallbacks'].items()):
+            rate = f"{fallback['rate']:.2f}" if fallback['rate'] is not None else 'n/a'
+            lines.append(f"  fallbacks {kind}: total={fallback['total']} rate={rate} reasons={fallback['reasons']}")
+
+        return "\n".join(lines)
+
+    @staticmethod
+    def _round(value, digits=1):
+        """Round an optional number for display"""
+        return None if value is None else round(value, digits)
+
+    def start_logging(self, interval):
+        """Print a summary every interval seconds on a daemon thread"""
+        if not interval or self._log_thread is not None:
+            return
+
+        def log_loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    print(self.format_summary())
+                except Exception as e:
+                    print(f"Error logging LLM metrics: {e}")
+
+        self._log_thread = threading.Thread(target=log_loop, name='llm-metrics-log', daemon=True)
+        self._log_thread.start()
@@ -1,19 +1,288 @@
 import openai
+import copy
 import json
-import re
 import random
+import threading
+import time
+
+from services.circuit_breaker import CircuitBreaker
+from services.llm_cache import LLMResponseCache
+from services.json_stream import JSONStreamExtractor
+from services.llm_client import CallCancelledError, LLMClient
+from services.llm_metrics import LLMMetrics
+from services.single_flight import SingleFlight
+
+NUMBER = (int, float)
+
+DEFAULT_MODEL = "gpt-4"
+
+# Expected top-level fields per generation kind; checked while the response streams in
+RESPONSE_SCHEMAS = {
+    'region': {
+        'fields': {'name': str, 'description': str, 'map_data': dict, 'landmarks': list},
+        'required': ['name', 'description', 'map_data', 'landmarks']
+    },
+    'quest': {
+        'fields': {
+            'title': str, 'description': str, 'objective': str, 'difficulty': NUMBER,
+            'reward_xp': NUMBER, 'reward_gold': NUMBER, 'reward_items': list, 'steps': list
+        },
+        'required': ['title', 'description', 'objective', 'difficulty',
+                     'reward_xp', 'reward_gold', 'reward_items', 'steps']
+    },
+    'dialogue': {
+        'fields': {
+            'text': str, 'tone': str, 'relationship_change': NUMBER,
+            'offers_quest': bool, 'offers_trade': bool
+        },
+        'required': ['text']
+    },
+    'enemy': {
+        'fields': {
+            'name': str, 'description': str, 'level': NUMBER, 'health': NUMBER,
+            'attack': NUMBER, 'defense': NUMBER, 'abilities': list, 'weaknesses': list,
+            'resistances': list, 'xp_value': NUMBER, 'gold_value': NUMBER, 'drop_table': list
+        },
+        'required': ['name', 'health', 'attack', 'defense', 'abilities',
+                     'xp_value', 'gold_value', 'drop_table']
+    },
+    'item': {
+        'fields': {
+            'name': str, 'description': str, 'item_type': str, 'subtype': str, 'rarity': str,
+            'level_requirement': NUMBER, 'properties': dict, 'value': NUMBER
+        },
+        'required': ['name', 'item_type', 'rarity', 'properties']
+    }
+}
 
 class LLMService:
     """Service for integrating Large Language Models into the game"""
     
-    def __init__(self, api_key):
-        """Initialize with OpenAI API key"""
+    def __init__(self, api_key, cache=None, client=None, deadlines=None, vary_shared_results=True, api_base=None,
+                 history_token_budget=300, summary_max_words=120, breaker_settings=None, hedge_deadlines=None,
+                 metrics=None, model_tiers=None, model_routes=None):
+        """Initialize with OpenAI API key, an optional LLMResponseCache, LLMClient and LLMMetrics"""
         openai.api_key = api_key
-    
-    def generate_text(self, prompt, max_tokens=300, temperature=0.7, model="gpt-4"):
+        if api_base:
+            # e.g. the local stub server used for load testing
+            openai.api_base = api_base
+        self.cache = cache
+        self.client = client or LLMClient()
+        self.metrics = metrics or LLMMetrics()
+        # Per-kind call deadlines in seconds (falls back to the client's request timeout)
+        self.deadlines = deadlines or {}
+        # Identical in-flight prompts share one completion
+        self.single_flight = SingleFlight()
+        self.vary_shared_results = vary_shared_results
+        # Hard cap on dialogue prompt tokens spent on summary + recent turns
+        self.history_token_budget = history_token_budget
+        self.summary_max_words = summary_max_words
+        # One circuit breaker per kind, created on first use with these settings
+        self.breaker_settings = breaker_settings or {}
+        self.breakers = {}
+        self._breakers_lock = threading.Lock()
+        # Per-kind seconds to wait before giving up on the LLM and serving the procedural fallback;
+        # the completion keeps running in the background and still fills the cache
+        self.hedge_deadlines = hedge_deadlines or {}
+        # Tier name -> model, and kind -> {'tier', 'max_tokens', 'escalate_to'}; unrouted kinds use DEFAULT_MODEL
+        self.model_tiers = model_tiers or {}
+        self.model_routes = model_routes or {}
+
+    def _route(self, kind, max_tokens=None):
+        """Resolve a kind to (model, max_tokens, escalation model or None) using the routing table"""
+        route = self.model_routes.get(kind, {})
+        model = self.model_tiers.get(route.get('tier'), DEFAULT_MODEL)
+        escalate_to = self.model_tiers.get(route.get('escalate_to'))
+        if escalate_to == model:
+            escalate_to = None
+        return model, route.get('max_tokens', max_tokens), escalate_to
+
+    def _generate_json(self, kind, system_prompt, prompt, max_tokens, temperature=0.7, vary=None, fresh=False):
+        """Run a JSON-returning completion on the kind's routed model, escalating to the
+        stronger tier when the response fails validation. fresh=True always samples a new
+        completion, bypassing the cache and in-flight coalescing"""
+        model, max_tokens, escalate_to = self._route(kind, max_tokens)
+        self.metrics.record_request(kind)
+
+        try:
+            return self._generate_json_with_model(kind, system_prompt, prompt, max_tokens, temperature, model, vary, fresh)
+        except ValueError as e:
+            # Only validation failures escalate; timeouts and open circuits go straight to the fallback
+            if not escalate_to:
+                raise
+            print(f"Escalating {kind} generation from {model} to {escalate_to}: {e}")
+            self.metrics.record_escalation(kind, model, escalate_to)
+            return self._generate_json_with_model(kind, system_prompt, prompt, max_tokens, temperature, escalate_to, vary, fresh)
+
+    def _generate_json_with_model(self, kind, system_prompt, prompt, max_tokens, temperature, model, vary, fresh=False):
+        """Run a JSON-returning completion, serving repeated prompts from the cache
+        and coalescing identical requests that are already in flight"""
+        if fresh:
+            # No fingerprint: neither read from nor written to the cache
+            return self._complete_json(kind, system_prompt, prompt, max_tokens, temperature, model, None)
+
+        fingerprint = LLMResponseCache.fingerprint(system_prompt, prompt, model, temperature, max_tokens)
+
+        if self.cache is not None:
+            cached = self.cache.get(kind, fingerprint)
+            self.metrics.record_cache(kind, cached is not None)
+            if cached is not None:
+                return self._vary_shared(json.loads(cached), vary)
+
+        result, shared = self.single_flight.do(
+            fingerprint, self._complete_json,
+            kind, system_prompt, prompt, max_tokens, temperature, model, fingerprint
+        )
+
+        # Every caller gets its own copy so nobody mutates another player's payload
+        result = copy.deepcopy(result)
+        if shared:
+            result = self._vary_shared(result, vary)
+        return result
+
+    def _breaker(self, kind):
+        """Get (or create) the circuit breaker for a kind"""
+        breaker = self.breakers.get(kind)
+        if breaker is None:
+            with self._breakers_lock:
+                breaker = self.breakers.get(kind)
+                if breaker is None:
+                    breaker = CircuitBreaker(kind, **self.breaker_settings)
+                    self.breakers[kind] = breaker
+        return breaker
+
+    def get_breaker_stats(self):
+        """Get a snapshot of every circuit breaker"""
+        return {kind: breaker.snapshot() for kind, breaker in list(self.breakers.items())}
+
+    def _complete_json(self, kind, system_prompt, prompt, max_tokens, temperature, model, fingerprint):
+        """Call the API behind the kind's circuit breaker, waiting at most the hedge deadline"""
+        # Raises CircuitOpenError while open, so callers drop straight to their fallback
+        breaker = self._breaker(kind)
+        breaker.check()
+
+        timeout = self.deadlines.get(kind)
+        hedge = self.hedge_deadlines.get(kind)
+        if hedge and (timeout is None or hedge < timeout):
+            timeout = hedge
+
+        try:
+            return self.client.call(
+                self._run_json,
+                kind, system_prompt, prompt, max_tokens, temperature, model, fingerprint,
+                timeout=timeout
+            )
+        except CallCancelledError:
+            # _run_json never ran, so it won't record an outcome; free the probe slot it held
+            breaker.release()
+            raise
+
+    def _run_json(self, kind, system_prompt, prompt, max_tokens, temperature, model, fingerprint):
+        """Stream and parse a JSON completion, recording its outcome and caching the result.
+        Runs to completion even when the caller has already hedged to a fallback"""
+        breaker = self._breaker(kind)
+        stats = {}
+        started = time.monotonic()
+        try:
+            result = self._stream_json(kind, system_prompt, prompt, max_tokens, temperature, model, stats)
+        except Exception as e:
+            elapsed = time.monotonic() - started
+            # Invalid output is the router's concern (it escalates); the provider itself did respond
+            breaker.record(isinstance(e, ValueError), elapsed)
+            self.metrics.record_call(kind, model, elapsed, stats, error=e)
+            raise
+        elapsed = time.monotonic() - started
+        breaker.record(True, elapsed)
+        self.metrics.record_call(kind, model, elapsed, stats)
+
+        # Only cache responses that parsed successfully and whole; a repaired one is missing its tail
+        if self.cache is not None and fingerprint and not stats.get('repaired'):
+            self.cache.set(kind, fingerprint, json.dumps(result))
+
+        return result
+
+    def _guarded_complete(self, kind, **kwargs):
+        """Run a plain chat completion behind the kind's circuit breaker"""
+        self.metrics.record_request(kind)
+        breaker = self._breaker(kind)
+        breaker.check()
+
+        model = kwargs.get('model')
+        stats = {}
+        started = time.monotonic()
+        try:
+            response = self.client.complete(timeout=self.deadlines.get(kind), stats=stats, **kwargs)
+        except Exception as e:
+            elapsed = time.monotonic() - started
+            breaker.record(False, elapsed)
+            self.metrics.record_call(kind, model, elapsed, stats, error=e)
+            raise
+        elapsed = time.monotonic() - started
+        breaker.record(True, elapsed)
+
+        usage = response.get('usage') or {}
+        stats['prompt_tokens'] = usage.get('prompt_tokens')
+        stats['completion_tokens'] = usage.get('completion_tokens')
+        self.metrics.record_call(kind, model, elapsed, stats)
+        return response
+
+    def _stream_json(self, kind, system_prompt, prompt, max_tokens, temperature, model, stats=None):
+        """Stream a completion through the JSON extractor, stopping as soon as the
+        object is complete or the schema is already violated"""
+        extractor = JSONStreamExtractor(RESPONSE_SCHEMAS.get(kind))
+        if stats is not None:
+            # Streamed responses carry no usage block, so estimate the prompt side
+            stats['prompt_tokens'] = self.estimate_tokens(system_prompt) + self.estimate_tokens(prompt)
+        stream = self.client.stream(
+            timeout=self.deadlines.get(kind),
+            stats=stats,
+            model=model,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens=max_tokens,
+            temperature=temperature
+        )
+
+        try:
+            for delta in stream:
+                if extractor.feed(delta):
+                    break
+        finally:
+            # Closing the generator drops the connection, so the rest isn't generated for nothing
+            stream.close()
+
+        result = extractor.result()
+        if stats is not None:
+            stats['repaired'] = extractor.repaired
+        return result
+
+    def _vary_shared(self, result, vary):
+        """Apply per-caller variation to a result that was shared with other callers"""
+        if vary is None or not self.vary_shared_results:
+            return result
+        try:
+            return vary(result)
+        except Exception as e:
+            print(f"Error applying variation to shared LLM result: {e}")
+            return result
+
+    def _vary_enemy(self, enemy):
+        """Jitter a shared enemy's combat stats so simultaneous encounters don't feel cloned"""
+        for stat in ('health', 'attack', 'defense'):
+            value = enemy.get(stat)
+            if isinstance(value, (int, float)) and value > 0:
+                enemy[stat] = max(1, int(round(value * random.uniform(0.9, 1.1))))
+        return enemy
+
+    def generate_text(self, prompt, max_tokens=300, temperature=0.7, model=None):
         """Generate text using OpenAI API"""
+        routed_model, max_tokens, _ = self._route('text', max_tokens)
+        model = model or routed_model
         try:
-            response = openai.ChatCompletion.create(
+            response = self._guarded_complete(
+                'text',
                 model=model,
                 messages=[
                     {"role": "system", "content": "You are a creative fantasy game assistant."},
@@ -25,6 +294,7 @@ class LLMService:
             return response.choices[0].message.content
         except Exception as e:
             print(f"Error in LLM text generation: {e}")
+            self.metrics.record_fallback('text', e)
             # Fallback response
             return self._generate_fallback_text(prompt)
     
@@ -888,8 +1158,9 @@ class LLMService:
             "landmarks": landmarks
         }
     
-    def generate_region(self, theme, difficulty, player_level):
-        """Generate a region description and features"""
+    def generate_region(self, theme, difficulty, player_level, fallback=True):
+        """Generate a region description and features.
+        fallback=False raises on failure instead of returning the built-in fallback region"""
         system_prompt = """You are a fantasy world builder. Create vivid, detailed regions for 
         a text-based role playing game. Provide consistent, usable information 
         in a structured format following the requested JSON schema."""
@@ -921,25 +1192,13 @@ class LLMService:
         Ensure coordinates don't overlap."""
         
         try:
-            response = openai.ChatCompletion.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=800,
-                temperature=0.7
-            )
-            
-            # Extract JSON from response
-            json_text = response.choices[0].message.content
-            # Clean up the response to ensure valid JSON
-            json_text = re.sub(r'```json', '', json_text)
-            json_text = re.sub(r'```', '', json_text)
-            return json.loads(json_text)
+            return self._generate_json('region', system_prompt, prompt, max_tokens=800)
         
         except Exception as e:
             print(f"Error in region generation: {e}")
+            self.metrics.record_fallback('region', e)
+            if not fallback:
+                raise
             # Fallback to procedural generation
             return self._generate_fallback_region(theme, difficulty, player_level)
     
@@ -986,40 +1245,58 @@ class LLMService:
         Include 3-5 steps to complete the quest."""
         
         try:
-            response = openai.ChatCompletion.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=800,
-                temperature=0.7
-            )
-            
-            # Extract JSON from response
-            json_text = response.choices[0].message.content
-            # Clean up the response to ensure valid JSON
-            json_text = re.sub(r'```json', '', json_text)
-            json_text = re.sub(r'```', '', json_text)
-            return json.loads(json_text)
+            return self._generate_json('quest', system_prompt, prompt, max_tokens=800)
         
         except Exception as e:
             print(f"Error in quest generation: {e}")
+            self.metrics.record_fallback('quest', e)
             # Fallback to procedural generation
             return self._generate_fallback_quest(character, region, quest_type)
     
-    def generate_dialogue(self, npc, character, conversation_history, intent, relationship):
-        """Generate contextual dialogue for an NPC"""
-        system_prompt = """You are a dialogue writer for a fantasy RPG. Create natural, character-appropriate 
+    DIALOGUE_SYSTEM_PROMPT = """You are a dialogue writer for a fantasy RPG. Create natural, character-appropriate 
         responses for NPCs that maintain consistent personality and reflect their relationship with the player."""
-        
-        # Format previous conversation
-        formatted_history = ""
-        for entry in conversation_history[-5:]:  # Last 5 exchanges
+    
+    # Separates the spoken line from the trailing metadata in streamed dialogue
+    DIALOGUE_STREAM_DELIMITER = "###"
+    
+    @staticmethod
+    def estimate_tokens(text):
+        """Rough token count for prompt budgeting (about four characters per token)"""
+        return (len(text) + 3) // 4
+    
+    def _format_history(self, npc, conversation_history, summary):
+        """Format the summary and most recent turns, keeping them under the history token budget"""
+        budget = self.history_token_budget
+        summary_text = ""
+        
+        if summary:
+            # The summary may use up to half of the budget; recent turns get the rest
+            max_chars = (budget // 2) * 4
+            if len(summary) > max_chars:
+                summary = summary[:max_chars].rsplit(' ', 1)[0] + "..."
+            summary_text = f"(Summary of earlier conversations: {summary})\n"
+        
+        used = self.estimate_tokens(summary_text)
+        lines = []
+        
+        # Newest turns matter most, so fill the budget from the end
+        for entry in reversed(conversation_history[-5:]):  # Last 5 exchanges
             speaker = "Player" if entry.get('speaker') == 'player' else npc.name
-            formatted_history += f"{speaker}: {entry.get('text')}\n"
+            line = f"{speaker}: {entry.get('text')}\n"
+            cost = self.estimate_tokens(line)
+            if used + cost > budget:
+                break
+            lines.insert(0, line)
+            used += cost
+        
+        return summary_text + "".join(lines)
+    
+    def _build_dialogue_context(self, npc, character, conversation_history, intent, relationship, summary=None):
+        """Build the shared NPC/player context used by both dialogue prompts"""
+        # Format previous conversation
+        formatted_history = self._format_history(npc, conversation_history, summary)
         
-        prompt = f"""Generate dialogue for {npc.name}, a {npc.race} {npc.occupation} with a {npc.personality} personality.
+        return f"""Generate dialogue for {npc.name}, a {npc.race} {npc.occupation} with a {npc.personality} personality.
         The player is a level {character.level} {character.character_class} named {character.name}.
         Their relationship status is: {relationship.status} (Value: {relationship.value}/100)
         
@@ -1028,7 +1305,16 @@ class LLMService:
         Current conversation intent: {intent}
         
         Previous conversation:
-        {formatted_history}
+        {formatted_history}"""
+    
+    def generate_dialogue(self, npc, character, conversation_history, intent, relationship, summary=None, variant=False,
+                          fallback=True):
+        """Generate contextual dialogue for an NPC.
+        variant=True samples a new line at a higher temperature for the stock-line pool;
+        fallback=False raises on failure instead of returning a procedural line"""
+        context = self._build_dialogue_context(npc, character, conversation_history, intent, relationship, summary)
+        
+        prompt = f"""{context}
         
         Return the response in valid JSON format with the following structure:
         {{
@@ -1044,27 +1330,168 @@ class LLMService:
         If the relationship is good, the NPC should be more helpful and friendly."""
         
         try:
-            response = openai.ChatCompletion.create(
-                model="gpt-4",
+            if variant:
+                return self._generate_json('dialogue', self.DIALOGUE_SYSTEM_PROMPT, prompt, max_tokens=400,
+                                           temperature=0.95, fresh=True)
+            return self._generate_json('dialogue', self.DIALOGUE_SYSTEM_PROMPT, prompt, max_tokens=400)
+        
+        except Exception as e:
+            print(f"Error in dialogue generation: {e}")
+            self.metrics.record_fallback('dialogue', e)
+            if not fallback:
+                raise
+            # Fallback to procedural generation
+            return self._generate_fallback_dialogue(npc, character, intent, relationship)
+    
+    def stream_dialogue(self, npc, character, conversation_history, intent, relationship, summary=None):
+        """Stream NPC dialogue, yielding ('chunk', text) events and a final ('done', dialogue_data)"""
+        context = self._build_dialogue_context(npc, character, conversation_history, intent, relationship, summary)
+        delimiter = self.DIALOGUE_STREAM_DELIMITER
+        
+        prompt = f"""{context}
+        
+        First write only the NPC's spoken response as plain text, with no quotes or labels.
+        Then write a new line containing exactly {delimiter} followed by valid JSON with this structure:
+        {{
+            "tone": "friendly|neutral|suspicious|hostile",
+            "relationship_change": Change in relationship value (-5 to +5),
+            "offers_quest": Boolean indicating if dialogue suggests a quest,
+            "offers_trade": Boolean indicating if dialogue suggests trading
+        }}
+        
+        The response should reflect the NPC's personality and their relationship with the player.
+        If the relationship is poor, the NPC should be more guarded or hostile.
+        If the relationship is good, the NPC should be more helpful and friendly."""
+        
+        model, max_tokens, _ = self._route('dialogue', 400)
+        spoken = []
+        pending = ""
+        metadata_text = None
+        breaker = self._breaker('dialogue')
+        stats = {'prompt_tokens': self.estimate_tokens(self.DIALOGUE_SYSTEM_PROMPT) + self.estimate_tokens(prompt)}
+        started = None
+        error = None
+        self.metrics.record_request('dialogue_stream')
+        
+        try:
+            breaker.check()
+            started = time.monotonic()
+            stream = self.client.stream(
+                timeout=self.deadlines.get('dialogue'),
+                stats=stats,
+                model=model,
                 messages=[
-                    {"role": "system", "content": system_prompt},
+                    {"role": "system", "content": self.DIALOGUE_SYSTEM_PROMPT},
                     {"role": "user", "content": prompt}
                 ],
-                max_tokens=400,
+                max_tokens=max_tokens,
                 temperature=0.7
             )
             
-            # Extract JSON from response
-            json_text = response.choices[0].message.content
-            # Clean up the response to ensure valid JSON
-            json_text = re.sub(r'```json', '', json_text)
-            json_text = re.sub(r'```', '', json_text)
-            return json.loads(json_text)
+            for delta in stream:
+                if metadata_text is not None:
+                    metadata_text += delta
+                    continue
+                
+                pending += delta
+                if delimiter in pending:
+                    text, metadata_text = pending.split(delimiter, 1)
+                    pending = ""
+                else:
+                    # Hold back a possible partial delimiter at the end of the buffer
+                    split_at = len(pending) - (len(delimiter) - 1)
+                    if split_at <= 0:
+                        continue
+                    text, pending = pending[:split_at], pending[split_at:]
+                
+                if text:
+                    spoken.append(text)
+                    yield ('chunk', text)
+            
+            if pending and metadata_text is None:
+                spoken.append(pending)
+                yield ('chunk', pending)
+            
+            breaker.record(True, time.monotonic() - started)
+            self.metrics.record_call('dialogue_stream', model, time.monotonic() - started, stats)
         
         except Exception as e:
-            print(f"Error in dialogue generation: {e}")
-            # Fallback to procedural generation
-            return self._generate_fallback_dialogue(npc, character, intent, relationship)
+            print(f"Error in dialogue streaming: {e}")
+            error = e
+            if started is not None:
+                breaker.record(False, time.monotonic() - started)
+                self.metrics.record_call('dialogue_stream', model, time.monotonic() - started, stats, error=e)
+        
+        fallback = self._generate_fallback_dialogue(npc, character, intent, relationship)
+        text = "".join(spoken).strip()
+        
+        if not text:
+            self.metrics.record_fallback('dialogue_stream', error)
+            # Nothing usable arrived; send the procedural line in one piece
+            yield ('chunk', fallback['text'])
+            yield ('done', fallback)
+            return
+        
+        dialogue_data = {
+            "text": text,
+            "tone": fallback['tone'],
+            "relationship_change": 0,
+            "offers_quest": fallback['offers_quest'],
+            "offers_trade": fallback['offers_trade']
+        }
+        
+        if metadata_text:
+            try:
+                extractor = JSONStreamExtractor({'fields': RESPONSE_SCHEMAS['dialogue']['fields']})
+                extractor.feed(metadata_text)
+                metadata = extractor.result()
+                for key in ('tone', 'relationship_change', 'offers_quest', 'offers_trade'):
+                    if key in metadata:
+                        dialogue_data[key] = metadata[key]
+            except ValueError as e:
+                print(f"Error parsing streamed dialogue metadata: {e}")
+        
+        yield ('done', dialogue_data)
+    
+    def summarize_conversation(self, npc_name, previous_summary, turns):
+        """Fold older conversation turns into a short rolling summary"""
+        transcript = "\n".join(
+            f"{'Player' if turn.get('speaker') == 'player' else npc_name}: {turn.get('text')}"
+            for turn in turns
+        )
+        
+        prompt = f"""Update the running summary of a player's conversations with {npc_name}.
+        
+        Current summary:
+        {previous_summary or "(none yet)"}
+        
+        New conversation lines:
+        {transcript}
+        
+        Write an updated summary in at most {self.summary_max_words} words. Keep facts the NPC would
+        remember: promises, favors, quests discussed, insults and how the relationship has changed.
+        Return only the summary text."""
+        
+        model, max_tokens, _ = self._route('summary', self.summary_max_words * 2)
+        try:
+            response = self._guarded_complete(
+                'summary',
+                model=model,
+                messages=[
+                    {"role": "system", "content": "You summarize RPG conversations concisely for an NPC's memory."},
+                    {"role": "user", "content": prompt}
+                ],
+                max_tokens=max_tokens,
+                temperature=0.3
+            )
+            return response.choices[0].message.content.strip()
+        except Exception as e:
+            print(f"Error in conversation summarization: {e}")
+            self.metrics.record_fallback('summary', e)
+            # Keep the old summary and append the newest NPC lines, trimmed to size
+            recent = " ".join(turn.get('text', '') for turn in turns[-2:])
+            words = f"{previous_summary or ''} {recent}".split()
+            return " ".join(words[-self.summary_max_words:])
     
     def generate_enemy(self, enemy_type, difficulty, player_level):
         """Generate an enemy for combat"""
@@ -1106,25 +1533,11 @@ class LLMService:
         Include 2-3 unique abilities that fit the enemy type."""
         
         try:
-            response = openai.ChatCompletion.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=600,
-                temperature=0.7
-            )
-            
-            # Extract JSON from response
-            json_text = response.choices[0].message.content
-            # Clean up the response to ensure valid JSON
-            json_text = re.sub(r'```json', '', json_text)
-            json_text = re.sub(r'```', '', json_text)
-            return json.loads(json_text)
+            return self._generate_json('enemy', system_prompt, prompt, max_tokens=600, vary=self._vary_enemy)
         
         except Exception as e:
             print(f"Error in enemy generation: {e}")
+            self.metrics.record_fallback('enemy', e)
             # Fallback to procedural generation
             return self._generate_fallback_enemy(enemy_type, difficulty, player_level)
     
@@ -1157,24 +1570,10 @@ class LLMService:
         Include appropriate properties for the item type."""
         
         try:
-            response = openai.ChatCompletion.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=400,
-                temperature=0.7
-            )
-            
-            # Extract JSON from response
-            json_text = response.choices[0].message.content
-            # Clean up the response to ensure valid JSON
-            json_text = re.sub(r'```json', '', json_text)
-            json_text = re.sub(r'```', '', json_text)
-            return json.loads(json_text)
+            return self._generate_json('item', system_prompt, prompt, max_tokens=400)
         
         except Exception as e:
             print(f"Error in item generation: {e}")
+            self.metrics.record_fallback('item', e)
             # Fallback to procedural generation
             return self._generate_fallback_item(item_type, rarity, character_level)
\ No newline at end of file
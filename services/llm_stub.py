@@ -0,0 +1,238 @@
+"""Local OpenAI-compatible stand-in for load testing LLMService offline.
+
+Run with ``python -m services.llm_stub --port 5055`` and start the game server
+with ``LLM_USE_STUB=1``; LLMService then sends requests to ``LLM_STUB_URL``
+(default ``http://127.0.0.1:5055/v1``, set it if the stub runs elsewhere).
+"""
+import argparse
+import json
+import math
+import random
+import re
+import time
+import uuid
+from types import SimpleNamespace
+
+from flask import Flask, Response, jsonify, request
+
+from services.llm_service import LLMService
+
+# Default behaviour; every key can be overridden through create_stub_app(settings)
+DEFAULT_STUB_SETTINGS = {
+    'latency': {'distribution': 'lognormal', 'median': 1.5, 'sigma': 0.6, 'max': 30.0},
+    'tokens_per_second': 40,  # Streaming rate; 0 sends the whole stream at once
+    'error_rate': 0.02,  # Share of requests answered with an API error
+    'error_statuses': [429, 500, 503],
+    'malformed_rate': 0.05,  # Share of JSON responses that are truncated or wrapped in prose
+    'seed': None
+}
+
+def _sample_latency(settings, rng):
+    """Draw a response latency in seconds from the configured distribution"""
+    latency = settings['latency']
+    distribution = latency.get('distribution', 'fixed')
+
+    if distribution == 'lognormal':
+        value = rng.lognormvariate(math.log(latency.get('median', 1.0)), latency.get('sigma', 0.5))
+    elif distribution == 'uniform':
+        value = rng.uniform(latency.get('min', 0.0), latency.get('max', 1.0))
+    elif distribution == 'normal':
+        value = rng.gauss(latency.get('mean', 1.0), latency.get('stddev', 0.2))
+    else:  # fixed
+        value = latency.get('value', 0.0)
+
+    return max(0.0, min(value, latency.get('max', value)))
+
+def _match(pattern, text, default, cast=str):
+    """Extract the first group of a regex match, or return the default"""
+    match = re.search(pattern, text)
+    if not match:
+        return default
+    try:
+        return cast(match.group(1))
+    except ValueError:
+        return default
+
+def _detect_kind(system_prompt, prompt):
+    """Work out which LLMService method a request came from"""
+    system_prompt = system_prompt.lower()
+    if 'world builder' in system_prompt:
+        return 'region'
+    if 'quest designer' in system_prompt:
+        return 'quest'
+    if 'dialogue writer' in system_prompt:
+        return 'dialogue_stream' if LLMService.DIALOGUE_STREAM_DELIMITER in prompt else 'dialogue'
+    if 'monster designer' in system_prompt:
+        return 'enemy'
+    if 'item designer' in system_prompt:
+        return 'item'
+    return 'text'
+
+def _build_content(generator, kind, prompt):
+    """Produce schema-valid content for a prompt using the procedural fallbacks"""
+    if kind == 'region':
+        theme = _match(r"theme '(\w+)'", prompt, 'forest')
+        difficulty = _match(r"difficulty level (\d+)", prompt, 1, int)
+        player_level = _match(r"level (\d+) player", prompt, 1, int)
+        return json.dumps(generator._generate_fallback_region(theme, difficulty, player_level))
+
+    if kind == 'quest':
+        quest_type = _match(r"Generate an? (\w+) quest", prompt, 'fetch')
+        character = SimpleNamespace(level=_match(r"for a level (\d+)", prompt, 1, int))
+        region = SimpleNamespace(theme=_match(r"with a (\w+) environment", prompt, 'forest'))
+        return json.dumps(generator._generate_fallback_quest(character, region, quest_type))
+
+    if kind in ('dialogue', 'dialogue_stream'):
+        npc = SimpleNamespace(personality=_match(r"with an? (\w+) personality", prompt, 'neutral'))
+        character = SimpleNamespace(name=_match(r"named ([^.\n]+)\.", prompt, 'traveler'))
+        relationship = SimpleNamespace(status=_match(r"relationship status is: (\w+)", prompt, 'neutral'))
+        intent = _match(r"Current conversation intent: (\w+)", prompt, 'greeting')
+        dialogue = generator._generate_fallback_dialogue(npc, character, intent, relationship)
+
+        if kind == 'dialogue':
+            return json.dumps(dialogue)
+
+        text = dialogue.pop('text')
+        return f"{text}\n{LLMService.DIALOGUE_STREAM_DELIMITER}\n{json.dumps(dialogue)}"
+
+    if kind == 'enemy':
+        enemy_type = _match(r"Create an? (\w+) enemy", prompt, 'beast')
+        player_level = _match(r"level (\d+) player", prompt, 1, int)
+        difficulty = _match(r"difficulty (\d+)", prompt, 1, int)
+        return json.dumps(generator._generate_fallback_enemy(enemy_type, difficulty, player_level))
+
+    if kind == 'item':
+        rarity = _match(r"Create an? (\w+) \w+ appropriate", prompt, 'common')
+        item_type = _match(r"Create an? \w+ (\w+) appropriate", prompt, 'weapon')
+        character_level = _match(r"level (\d+) character", prompt, 1, int)
+        return json.dumps(generator._generate_fallback_item(item_type, rarity, character_level))
+
+    return generator._generate_fallback_text(prompt)
+
+def _malform(content, rng):
+    """Break a JSON response the way real completions tend to break"""
+    mode = rng.choice(['truncate', 'prose', 'fence'])
+    if mode == 'truncate':
+        return content[:rng.randint(1, max(1, len(content) - 1))]
+    if mode == 'prose':
+        return f"Sure! Here is what you asked for:\n{content}\nLet me know if you need anything else."
+    return f"```json\n{content}\n```\nHope this helps!"
+
+def _count_tokens(text):
+    """Rough token estimate (about four characters per token)"""
+    return max(1, len(text) // 4)
+
+def create_stub_app(settings=None):
+    """Create the Flask app serving /v1/chat/completions"""
+    settings = dict(DEFAULT_STUB_SETTINGS, **(settings or {}))
+    rng = random.Random(settings['seed'])
+    generator = LLMService('stub-key')
+    app = Flask(__name__)
+    app.config['STUB_SETTINGS'] = settings
+
+    @app.route('/v1/chat/completions', methods=['POST'])
+    def chat_completions():
+        """OpenAI-compatible chat completion endpoint"""
+        data = request.get_json(force=True) or {}
+        messages = data.get('messages', [])
+        system_prompt = next((m['content'] for m in messages if m.get('role') == 'system'), '')
+        prompt = next((m['content'] for m in reversed(messages) if m.get('role') == 'user'), '')
+        model = data.get('model', 'stub')
+        stream = data.get('stream', False)
+
+        time.sleep(_sample_latency(settings, rng))
+
+        # Injected API failures
+        if rng.random() < settings['error_rate']:
+            status = rng.choice(settings['error_statuses'])
+            return jsonify({
+                "error": {
+                    "message": f"Injected stub failure ({status})",
+                    "type": "server_error" if status >= 500 else "rate_limit_error",
+                    "code": None
+                }
+            }), status
+
+        kind = _detect_kind(system_prompt, prompt)
+        content = _build_content(generator, kind, prompt)
+
+        # Injected malformed output (never for plain text, which has no schema)
+        if kind != 'text' and rng.random() < settings['malformed_rate']:
+            content = _malform(content, rng)
+
+        completion_id = f"chatcmpl-stub-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+
+        if not stream:
+            return jsonify({
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop"
+                }],
+                "usage": {
+                    "prompt_tokens": _count_tokens(system_prompt + prompt),
+                    "completion_tokens": _count_tokens(content),
+                    "total_tokens": _count_tokens(system_prompt + prompt) + _count_tokens(content)
+                }
+            })
+
+        def generate_events():
+            """Emit the content as server-sent events at the configured token rate"""
+            tokens_per_second = settings['tokens_per_second']
+            delay = 1.0 / tokens_per_second if tokens_per_second else 0
+            for i in range(0, len(content), 4):
+                chunk = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [{"index": 0, "delta": {"content": content[i:i + 4]}, "finish_reason": None}]
+                }
+                yield f"data: {json.dumps(chunk)}\n\n"
+                if delay:
+                    time.sleep(delay)
+
+            final = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]
+            }
+            yield f"data: {json.dumps(final)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return Response(generate_events(), mimetype='text/event-stream')
+
+    return app
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run the local OpenAI-compatible stub server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--median-latency', type=float, default=DEFAULT_STUB_SETTINGS['latency']['median'])
+    parser.add_argument('--latency-sigma', type=float, default=DEFAULT_STUB_SETTINGS['latency']['sigma'])
+    parser.add_argument('--tokens-per-second', type=float, default=DEFAULT_STUB_SETTINGS['tokens_per_second'])
+    parser.add_argument('--error-rate', type=float, default=DEFAULT_STUB_SETTINGS['error_rate'])
+    parser.add_argument('--malformed-rate', type=float, default=DEFAULT_STUB_SETTINGS['malformed_rate'])
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    stub_app = create_stub_app({
+        'latency': {
+            'distribution': 'lognormal',
+            'median': args.median_latency,
+            'sigma': args.latency_sigma,
+            'max': 30.0
+        },
+        'tokens_per_second': args.tokens_per_second,
+        'error_rate': args.error_rate,
+        'malformed_rate': args.malformed_rate,
+        'seed': args.seed
+    })
+    stub_app.run(host=args.host, port=args.port, threaded=True)
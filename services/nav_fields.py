@@ -0,0 +1,133 @@
+import threading
+from collections import OrderedDict
+
+from services.navigation import MOVEMENT_TILE_COSTS, NavigationGrid, flow_field, follow_flow
+
+class RegionNavigation:
+    """Precomputed navigation data per region for server-side movement.
+
+    Each cached region holds its cost grid (built from the tiles as served), distance
+    fields to every Location and flow fields toward targets. Agents then move by
+    looking up their tile in a flow field instead of searching.
+    """
+
+    def __init__(self, chunk_manager, max_regions=32, max_flow_fields=64):
+        """Initialize with the chunk manager that serves region tiles"""
+        self.chunk_manager = chunk_manager
+        self.max_regions = max_regions
+        self.max_flow_fields = max_flow_fields
+
+        # region_id -> {'map_key', 'grid', 'location_fields', 'flows'} (LRU ordered)
+        self._regions = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'grids': 0, 'location_fields': 0, 'flow_hits': 0, 'flow_misses': 0, 'invalidations': 0}
+
+    def get_grid(self, region):
+        """Get the region's navigation grid"""
+        return self._entry(region)['grid']
+
+    def get_location_fields(self, region):
+        """Distance fields to every Location in the region, keyed by location id"""
+        entry = self._entry(region)
+        fields = entry['location_fields']
+        if fields is not None:
+            return fields
+
+        grid = entry['grid']
+        fields = {
+            location.id: grid.distance_field([(location.x_coord, location.y_coord)])
+            for location in region.locations
+            if location.x_coord is not None and location.y_coord is not None
+        }
+        with self._lock:
+            if entry['location_fields'] is None:
+                entry['location_fields'] = fields
+                self.stats['location_fields'] += len(fields)
+            return entry['location_fields']
+
+    def get_flow_field(self, region, target):
+        """Flow field toward a target tile (x, y)"""
+        entry = self._entry(region)
+        target = tuple(target)
+        return self._flow(entry, target, lambda: entry['grid'].distance_field([target]))
+
+    def get_location_flow_field(self, region, location_id):
+        """Flow field toward a Location, reusing its precomputed distance field"""
+        fields = self.get_location_fields(region)
+        if location_id not in fields:
+            return None
+        return self._flow(self._entry(region), ('location', location_id), lambda: fields[location_id])
+
+    def next_step(self, region, x, y, target):
+        """Next tile for an agent at (x, y) heading to target; None once there or if unreachable"""
+        return follow_flow(self.get_flow_field(region, target), x, y)
+
+    def invalidate(self, region_id):
+        """Drop everything cached for a region"""
+        with self._lock:
+            if self._regions.pop(region_id, None) is not None:
+                self.stats['invalidations'] += 1
+
+    def get_stats(self):
+        """Get cache counters and the number of cached regions"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats['regions'] = len(self._regions)
+            return stats
+
+    def _entry(self, region):
+        """Get a region's cache entry, building its grid on first use or after its map was regenerated"""
+        # Load the map first: a region from an older generator version is upgraded here, changing its key
+        map_data = region.get_map_data()
+        map_key = (region.get_seed(), region.generator_version)
+        with self._lock:
+            entry = self._regions.get(region.id)
+            if entry is not None and entry['map_key'] == map_key:
+                self._regions.move_to_end(region.id)
+                return entry
+
+        tiles = map_data.get('tiles') or []
+        width = map_data.get('width') or (len(tiles[0]) if tiles else 0)
+        height = map_data.get('height') or len(tiles)
+        if width and height:
+            # Read through the chunk manager, whose chunks are keyed by the same seed and
+            # version, so the grid always matches the current map
+            tiles = self.chunk_manager.get_viewport(region, 0, 0, width, height)['tiles']
+        entry = {
+            'map_key': map_key,
+            'grid': NavigationGrid(tiles if width and height else [], MOVEMENT_TILE_COSTS),
+            'location_fields': None,
+            'flows': OrderedDict()
+        }
+
+        with self._lock:
+            current = self._regions.get(region.id)
+            if current is not None and current['map_key'] == map_key:
+                entry = current
+            else:
+                self._regions[region.id] = entry
+                self.stats['grids'] += 1
+            self._regions.move_to_end(region.id)
+            while len(self._regions) > self.max_regions:
+                self._regions.popitem(last=False)
+        return entry
+
+    def _flow(self, entry, key, make_distance_field):
+        """Get a cached flow field, computing it from a distance field on a miss"""
+        with self._lock:
+            flow = entry['flows'].get(key)
+            if flow is not None:
+                entry['flows'].move_to_end(key)
+                self.stats['flow_hits'] += 1
+                return flow
+            self.stats['flow_misses'] += 1
+
+        flow = flow_field(make_distance_field())
+
+        with self._lock:
+            flows = entry['flows']
+            flow = flows.setdefault(key, flow)
+            flows.move_to_end(key)
+            while len(flows) > self.max_flow_fields:
+                flows.popitem(last=False)
+        return flow
@@ -0,0 +1,312 @@
+import heapq
+
+import numpy as np
+
+# Movement cost per tile type; None marks a tile as impassable
+TILE_COSTS = {
+    'path': 1,
+    'grass': 2,
+    'forest': 3,
+    'sand': 2,
+    'rock': 4,
+    'mountain': 5,
+    'swamp': 4,
+    'water': 10,  # High cost to avoid water
+    'wall': 50,   # Very high cost to avoid walls
+    'door': 1,
+    'corridor': 1,
+    'stone': 2
+}
+
+# Cost for tile types missing from the table
+DEFAULT_TILE_COST = 2
+
+# Tiles characters can't walk onto. The generator's road builder may still cross them
+# at a cost (TILE_COSTS), but movement treats them as impassable; the client gets this list too
+BLOCKED_TILES = ('water', 'mountain', 'wall')
+
+# Costs for character and agent movement
+MOVEMENT_TILE_COSTS = dict(TILE_COSTS, **{tile: None for tile in BLOCKED_TILES})
+
+# 4-way movement
+DIRECTIONS = [(0, 1), (1, 0), (0, -1), (-1, 0)]
+
+class NavigationGrid:
+    """Movement cost grid for one map, searched with heap-based A*"""
+
+    def __init__(self, tiles, tile_costs=None, default_cost=DEFAULT_TILE_COST):
+        """Precompute the cost of every tile (row-major) from a 2D tile list"""
+        self.tile_costs = TILE_COSTS if tile_costs is None else tile_costs
+        self.default_cost = default_cost
+        self.height = len(tiles)
+        self.width = len(tiles[0]) if self.height > 0 else 0
+        self.costs = [self._tile_cost(tile) for row in tiles for tile in row]
+
+    @classmethod
+    def from_map_data(cls, map_data, tile_costs=None):
+        """Build a grid from a region's map_data dict"""
+        return cls(map_data.get('tiles', []), tile_costs)
+
+    def _tile_cost(self, tile):
+        """Look up a tile type's movement cost"""
+        return self.tile_costs.get(tile, self.default_cost)
+
+    def in_bounds(self, x, y):
+        """Check whether a coordinate is on the map"""
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def cost(self, x, y):
+        """Get the cost of entering a tile (None if impassable or off the map)"""
+        if not self.in_bounds(x, y):
+            return None
+        return self.costs[y * self.width + x]
+
+    def is_passable(self, x, y):
+        """Check whether a tile can be entered"""
+        return self.cost(x, y) is not None
+
+    def set_tile(self, x, y, tile):
+        """Update a tile's cost after the map changes"""
+        if self.in_bounds(x, y):
+            self.costs[y * self.width + x] = self._tile_cost(tile)
+
+    def neighbors(self, x, y):
+        """Yield (nx, ny, cost) for the passable tiles next to (x, y)"""
+        for dx, dy in DIRECTIONS:
+            nx, ny = x + dx, y + dy
+            cost = self.cost(nx, ny)
+            if cost is not None:
+                yield nx, ny, cost
+
+    def find_path(self, start, goal):
+        """Find the cheapest 4-way path from start to goal (inclusive); None if unreachable"""
+        width = self.width
+        costs = self.costs
+        start_x, start_y = start
+        goal_x, goal_y = goal
+
+        if not (self.in_bounds(start_x, start_y) and self.in_bounds(goal_x, goal_y)):
+            return None
+
+        start_index = start_y * width + start_x
+        goal_index = goal_y * width + goal_x
+
+        # Manhattan distance is admissible as long as every step costs at least 1
+        min_cost = min((cost for cost in costs if cost is not None), default=1)
+        scale = min(1, min_cost)
+
+        g_scores = [None] * len(costs)
+        parents = [-1] * len(costs)
+        closed = bytearray(len(costs))
+        g_scores[start_index] = 0
+        open_heap = [(0, 0, start_index)]
+
+        while open_heap:
+            _, g_score, index = heapq.heappop(open_heap)
+
+            if closed[index]:
+                continue
+            if index == goal_index:
+                return self._reconstruct(parents, index)
+            closed[index] = 1
+
+            x, y = index % width, index // width
+            for dx, dy in DIRECTIONS:
+                nx, ny = x + dx, y + dy
+                if nx < 0 or nx >= width or ny < 0 or ny >= self.height:
+                    continue
+
+                neighbor = ny * width + nx
+                move_cost = costs[neighbor]
+                if move_cost is None or closed[neighbor]:
+                    continue
+
+                new_g = g_score + move_cost
+                best = g_scores[neighbor]
+                if best is not None and new_g >= best:
+                    continue
+
+                g_scores[neighbor] = new_g
+                parents[neighbor] = index
+                h = (abs(nx - goal_x) + abs(ny - goal_y)) * scale
+                heapq.heappush(open_heap, (new_g + h, new_g, neighbor))
+
+        return None
+
+    def multi_source_dijkstra(self, sources):
+        """Grow shortest-path trees from all sources at once.
+
+        Returns flat (distances, owners, parents) lists: each reachable tile's cost
+        from its nearest source, that source's position in the list, and the
+        previous tile on the way there (-1 for sources and unreached tiles).
+        """
+        width = self.width
+        costs = self.costs
+        size = len(costs)
+        distances = [None] * size
+        owners = [-1] * size
+        parents = [-1] * size
+        heap = []
+
+        for owner, (x, y) in enumerate(sources):
+            if not self.in_bounds(x, y):
+                continue
+            index = y * width + x
+            if distances[index] is None:
+                distances[index] = 0
+                owners[index] = owner
+                heap.append((0, index))
+        heapq.heapify(heap)
+
+        while heap:
+            distance, index = heapq.heappop(heap)
+            if distance > distances[index]:
+                continue
+
+            x, y = index % width, index // width
+            for dx, dy in DIRECTIONS:
+                nx, ny = x + dx, y + dy
+                if nx < 0 or nx >= width or ny < 0 or ny >= self.height:
+                    continue
+
+                neighbor = ny * width + nx
+                move_cost = costs[neighbor]
+                if move_cost is None:
+                    continue
+
+                new_distance = distance + move_cost
+                best = distances[neighbor]
+                if best is None or new_distance < best:
+                    distances[neighbor] = new_distance
+                    owners[neighbor] = owners[index]
+                    parents[neighbor] = index
+                    heapq.heappush(heap, (new_distance, neighbor))
+
+        return distances, owners, parents
+
+    def distance_field(self, targets):
+        """Cost from every tile to its nearest target along the shortest-path tree, as a
+        (height, width) float array with inf where no target can be reached"""
+        distances, _, _ = self.multi_source_dijkstra(targets)
+        field = np.array([np.inf if distance is None else distance for distance in distances], dtype=np.float64)
+        return field.reshape(self.height, self.width)
+
+    def _reconstruct(self, parents, index):
+        """Walk parent pointers back from the goal"""
+        width = self.width
+        path = []
+        while index != -1:
+            path.append((index % width, index // width))
+            index = parents[index]
+        path.reverse()
+        return path
+
+def flow_field(distance_field):
+    """Index into DIRECTIONS of each tile's cheapest neighbor in a distance field; -1 at targets and
+    unreachable tiles. Following it always lowers the distance, so agents step toward a target in O(1)."""
+    height, width = distance_field.shape
+    padded = np.pad(distance_field, 1, constant_values=np.inf)
+    neighbors = np.stack([padded[1 + dy:1 + dy + height, 1 + dx:1 + dx + width] for dx, dy in DIRECTIONS])
+
+    flow = neighbors.argmin(axis=0).astype(np.int8)
+    flow[~(neighbors.min(axis=0) < distance_field)] = -1
+    return flow
+
+def follow_flow(flow, x, y):
+    """Next tile from (x, y) along a flow field; None when there is nowhere to go"""
+    height, width = flow.shape
+    if not (0 <= x < width and 0 <= y < height):
+        return None
+    direction = flow[y, x]
+    if direction < 0:
+        return None
+    dx, dy = DIRECTIONS[direction]
+    return x + dx, y + dy
+
+def straight_path(start, goal):
+    """Axis-aligned line from start to goal (x first, then y), used when no path exists"""
+    x, y = start
+    end_x, end_y = goal
+    path = []
+    while x != end_x or y != end_y:
+        path.append((x, y))
+        if x < end_x:
+            x += 1
+        elif x > end_x:
+            x -= 1
+        elif y < end_y:
+            y += 1
+        elif y > end_y:
+            y -= 1
+    return path + [(end_x, end_y)]
+
+class _DisjointSet:
+    """Union-find over integer ids, for Kruskal's algorithm"""
+
+    def __init__(self, size):
+        self.parent = list(range(size))
+
+    def find(self, item):
+        """Find an item's root, compressing the path"""
+        root = item
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[item] != root:
+            self.parent[item], item = root, self.parent[item]
+        return root
+
+    def union(self, a, b):
+        """Merge two sets; returns False if they were already joined"""
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a == root_b:
+            return False
+        self.parent[root_b] = root_a
+        return True
+
+def build_road_network(grid, points):
+    """Connect points with a minimum spanning tree of roads from one multi-source Dijkstra sweep.
+
+    Wherever two points' shortest-path regions touch, the boundary edge gives a
+    candidate road between them; Kruskal's algorithm keeps the cheapest set that
+    connects everything reachable. Returns (road mask as a (height, width) bool
+    array, list of (point_a, point_b) index pairs that were joined).
+    """
+    roads = np.zeros((grid.height, grid.width), dtype=bool)
+    if len(points) <= 1 or not grid.width:
+        return roads, []
+
+    distances, owners, parents = grid.multi_source_dijkstra(points)
+    width = grid.width
+
+    # Cheapest boundary crossing per pair of points
+    candidates = {}
+    for index, owner in enumerate(owners):
+        if owner < 0:
+            continue
+        x, y = index % width, index // width
+        # Right and down neighbors are enough to see every boundary edge once
+        for nx, ny in ((x + 1, y), (x, y + 1)):
+            if nx >= width or ny >= grid.height:
+                continue
+            neighbor = ny * width + nx
+            other = owners[neighbor]
+            if other < 0 or other == owner:
+                continue
+            weight = distances[index] + grid.costs[neighbor] + distances[neighbor]
+            pair = (min(owner, other), max(owner, other))
+            if pair not in candidates or weight < candidates[pair][0]:
+                candidates[pair] = (weight, index, neighbor)
+
+    joined = []
+    components = _DisjointSet(len(points))
+    for pair, (weight, index, neighbor) in sorted(candidates.items(), key=lambda item: item[1][0]):
+        if not components.union(*pair):
+            continue
+        joined.append(pair)
+        # Walk both halves of the road back to their points
+        for tile in (index, neighbor):
+            while tile != -1:
+                roads[tile // width, tile % width] = True
+                tile = parents[tile]
+
+    return roads, joined
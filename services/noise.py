@@ -0,0 +1,77 @@
+import numpy as np
+
+# Lattice size; noise repeats every PERIOD lattice cells
+PERIOD = 256
+
+def _fade(t):
+    """Perlin's quintic smoothstep, 6t^5 - 15t^4 + 10t^3"""
+    return t * t * t * (t * (t * 6 - 15) + 10)
+
+class GradientNoise:
+    """Vectorized 2D gradient (Perlin) noise evaluated over whole coordinate arrays.
+
+    The permutation table and gradients come from NumPy's legacy RandomState,
+    whose streams are frozen, so a given seed yields the same field on every run.
+    """
+
+    def __init__(self, seed):
+        """Build the permutation table and unit gradients for a seed"""
+        rng = np.random.RandomState(seed % (2 ** 32))
+        permutation = rng.permutation(PERIOD)
+        self.permutation = np.concatenate([permutation, permutation])
+        angles = rng.uniform(0, 2 * np.pi, PERIOD)
+        self.gradients = np.stack([np.cos(angles), np.sin(angles)], axis=-1)
+
+    def _corner_gradients(self, xi, yi):
+        """Look up the gradient vectors for integer lattice corners"""
+        index = self.permutation[self.permutation[xi & (PERIOD - 1)] + (yi & (PERIOD - 1))]
+        return self.gradients[index]
+
+    def field(self, xs, ys):
+        """Evaluate noise at every (xs, ys) pair; inputs broadcast, output is roughly in [-0.7, 0.7]"""
+        xs = np.asarray(xs, dtype=np.float64)
+        ys = np.asarray(ys, dtype=np.float64)
+        x0 = np.floor(xs)
+        y0 = np.floor(ys)
+        fx = xs - x0
+        fy = ys - y0
+        x0 = x0.astype(np.int64)
+        y0 = y0.astype(np.int64)
+
+        def corner(dx, dy):
+            """Dot product of a corner's gradient with the offset to the sample point"""
+            gradient = self._corner_gradients(x0 + dx, y0 + dy)
+            return gradient[..., 0] * (fx - dx) + gradient[..., 1] * (fy - dy)
+
+        u = _fade(fx)
+        v = _fade(fy)
+        bottom = corner(0, 0) + u * (corner(1, 0) - corner(0, 0))
+        top = corner(0, 1) + u * (corner(1, 1) - corner(0, 1))
+        return bottom + v * (top - bottom)
+
+def terrain_field(seed, width, height, offset_x=0, offset_y=0, scale=32,
+                  layers=((3, 0.5), (6, 0.3), (12, 0.2))):
+    """Sum weighted noise layers over a width x height window of world tiles.
+
+    layers holds (frequency, weight) pairs, where frequency counts noise cycles per
+    scale tiles. Coordinates are absolute, so windows with offsets tile seamlessly.
+    Returns a (height, width) float array.
+    """
+    xs = (np.arange(width) + offset_x) / scale - 0.5
+    ys = (np.arange(height) + offset_y) / scale - 0.5
+    grid_x, grid_y = np.meshgrid(xs, ys)
+
+    total = np.zeros((height, width))
+    for i, (frequency, weight) in enumerate(layers):
+        # Each layer gets its own seed, like separate noise generators
+        total += GradientNoise(seed + i).field(grid_x * frequency, grid_y * frequency) * weight
+    return total
+
+def classify(field, thresholds, tiles):
+    """Map a noise field to tile names in one array operation.
+
+    thresholds are ascending cut points; tiles has one more entry than thresholds.
+    Returns a list of rows of tile names.
+    """
+    indices = np.digitize(field, thresholds)
+    return np.asarray(tiles, dtype=object)[indices].tolist()
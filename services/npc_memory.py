@@ -0,0 +1,109 @@
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+class ConversationMemory:
+    """Keeps a rolling summary plus the last few turns per (character, NPC) pair"""
+
+    def __init__(self, llm_service, app, summarize_every=6, recent_turns=4, max_stored_turns=24, workers=1):
+        """Initialize with the LLM service used for summaries and the app for background DB access"""
+        self.llm_service = llm_service
+        self.app = app
+        self.summarize_every = summarize_every
+        self.recent_turns = recent_turns
+        self.max_stored_turns = max(max_stored_turns, summarize_every + recent_turns)
+
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='npc-memory')
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def _get_memory(self, character_id, npc_id, create=False):
+        """Load the memory row for a pair, optionally creating it"""
+        from app import db
+        from models.npc import NPCConversationMemory
+
+        memory = NPCConversationMemory.query.filter_by(
+            character_id=character_id,
+            npc_id=npc_id
+        ).first()
+
+        if not memory and create:
+            memory = NPCConversationMemory(
+                character_id=character_id,
+                npc_id=npc_id,
+                turn_count=0,
+                summarized_through=0
+            )
+            db.session.add(memory)
+
+        return memory
+
+    def get_context(self, character_id, npc_id):
+        """Get (summary, recent turns) for building a dialogue prompt"""
+        memory = self._get_memory(character_id, npc_id)
+        if not memory:
+            return None, []
+
+        turns = memory.get_turns()
+        return memory.summary, turns[-self.recent_turns:]
+
+    def record_turn(self, character_id, npc_id, speaker, text):
+        """Store a turn and schedule a summary refresh every summarize_every turns"""
+        from app import db
+
+        memory = self._get_memory(character_id, npc_id, create=True)
+        turn_count = memory.add_turn(speaker, text, self.max_stored_turns)
+        unsummarized = turn_count - (memory.summarized_through or 0)
+        db.session.commit()
+
+        if unsummarized >= self.summarize_every + self.recent_turns:
+            self._schedule_refresh(character_id, npc_id)
+
+    def _schedule_refresh(self, character_id, npc_id):
+        """Queue a background summary refresh unless one is already pending"""
+        key = (character_id, npc_id)
+        with self._lock:
+            if key in self._pending:
+                return
+            self._pending.add(key)
+        self._executor.submit(self._refresh_summary, character_id, npc_id)
+
+    def _refresh_summary(self, character_id, npc_id):
+        """Fold all but the most recent turns into the rolling summary"""
+        try:
+            with self.app.app_context():
+                from app import db
+                from models.npc import NPC
+
+                memory = self._get_memory(character_id, npc_id)
+                if not memory:
+                    return
+
+                turns = memory.get_turns()
+                to_fold = turns[:-self.recent_turns] if self.recent_turns else turns
+                if not to_fold:
+                    return
+
+                npc = NPC.query.get(npc_id)
+                npc_name = npc.name if npc else 'The NPC'
+                previous_summary = memory.summary
+
+                # The LLM call happens outside any row lock; new turns may arrive meanwhile
+                db.session.commit()
+                summary = self.llm_service.summarize_conversation(npc_name, previous_summary, to_fold)
+
+                memory = self._get_memory(character_id, npc_id)
+                cutoff = to_fold[-1]['turn']
+                memory.summary = summary
+                memory.summarized_through = cutoff
+                # Keep only the turns that were not folded (including any added meanwhile)
+                memory.recent_turns = json.dumps(
+                    [turn for turn in memory.get_turns() if turn['turn'] > cutoff]
+                )
+                db.session.commit()
+        except Exception as e:
+            print(f"Error refreshing conversation summary: {e}")
+        finally:
+            with self._lock:
+                self._pending.discard((character_id, npc_id))
+
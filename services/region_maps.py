@@ -0,0 +1,124 @@
+import threading
+from collections import OrderedDict
+
+from sqlalchemy.orm.attributes import set_committed_value
+
+from services.world_gen import GENERATOR_VERSION
+
+class RegionMapStore:
+    """Keeps procedural region maps as seed + generator version and regenerates their tiles on demand.
+
+    Regenerated maps live in a bounded in-memory LRU cache. Regions whose maps can't
+    be reproduced from a seed (LLM-generated ones) still store their tiles. A region
+    from an older generator version is upgraded as a whole (map and Locations) in
+    memory whenever its map is needed; 'flask regenerate-region-maps' persists that.
+    """
+
+    def __init__(self, world_generator, max_regions=64, store_procedural=False):
+        """Initialize with the generator that rebuilds maps; store_procedural=True keeps storing every map"""
+        self.world_generator = world_generator
+        self.max_regions = max_regions
+        self.store_procedural = store_procedural
+
+        self._maps = OrderedDict()  # (region_id, seed, generator_version) -> map_data dict
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'regenerated': 0, 'upgraded': 0}
+
+    def assign(self, region, region_data):
+        """Record a newly generated map on a region, storing its tiles only when they can't be regenerated"""
+        version = region_data.get('generator_version')
+        if version is not None and region.seed == region_data.get('seed') and not self.store_procedural:
+            region.generator_version = version
+            region.map_data = None
+            region.map_blob = None
+            # The map is already in hand; no need to rebuild it for this request
+            region._decoded_map = region_data['map_data']
+        else:
+            region.set_map_data(region_data['map_data'])
+
+    def get_map_data(self, region):
+        """Get a procedural region's map, regenerating it from the seed on a cache miss"""
+        if region.generator_version != GENERATOR_VERSION:
+            # Only the current generator exists, so its map can't be served without moving the Locations too.
+            # This is a read path: the upgrade stays in memory and is never flushed
+            self.upgrade(region, persist=False)
+
+        key = (region.id, region.get_seed(), region.generator_version)
+        with self._lock:
+            map_data = self._maps.get(key)
+            if map_data is not None:
+                self._maps.move_to_end(key)
+                self.stats['hits'] += 1
+                return map_data
+            self.stats['misses'] += 1
+
+        map_data = self.world_generator.generate_seeded_region(
+            region.get_seed(), region.theme, region.difficulty
+        )['map_data']
+
+        with self._lock:
+            self.stats['regenerated'] += 1
+        return self._remember(key, map_data)
+
+    def upgrade(self, region, persist=True):
+        """Regenerate a region with the current generator version and move its Locations onto
+        the new landmarks; returns the number of Locations moved.
+
+        With persist=True the changes are left in the session for the caller to commit.
+        With persist=False they are applied to the loaded objects as if already stored,
+        so they are never flushed and the rows keep their old values.
+        """
+        from models.world import Location
+
+        # Committed values don't mark the objects dirty, so a read never writes
+        assign = setattr if persist else set_committed_value
+
+        generated = self.world_generator.generate_seeded_region(
+            region.get_seed(), region.theme, region.difficulty
+        )
+        landmarks = generated['landmarks']
+
+        # Locations were created from the landmarks in order; move them onto the new layout
+        moved = 0
+        locations = Location.query.filter_by(region_id=region.id).order_by(Location.id).all()
+        if len(locations) == len(landmarks):
+            for location, landmark in zip(locations, landmarks):
+                assign(location, 'x_coord', landmark['x'])
+                assign(location, 'y_coord', landmark['y'])
+            moved = len(locations)
+        else:
+            print(f"Region {region.id}: {len(locations)} locations for {len(landmarks)} landmarks, left in place")
+
+        assign(region, 'generator_version', GENERATOR_VERSION)
+        if persist and (region.map_blob or region.map_data):
+            region.set_map_data(generated['map_data'])
+        else:
+            region._decoded_map = generated['map_data']
+
+        self.invalidate(region.id)
+        self._remember((region.id, region.get_seed(), region.generator_version), generated['map_data'])
+        with self._lock:
+            self.stats['upgraded'] += 1
+        return moved
+
+    def invalidate(self, region_id):
+        """Drop a region's cached map"""
+        with self._lock:
+            for key in [key for key in self._maps if key[0] == region_id]:
+                del self._maps[key]
+
+    def _remember(self, key, map_data):
+        """Cache a map, keeping the first copy if another request stored one meanwhile"""
+        with self._lock:
+            map_data = self._maps.setdefault(key, map_data)
+            self._maps.move_to_end(key)
+            while len(self._maps) > self.max_regions:
+                self._maps.popitem(last=False)
+        return map_data
+
+    def get_stats(self):
+        """Get cache counters and the number of cached maps"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats['cached'] = len(self._maps)
+            return stats
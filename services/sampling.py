@@ -0,0 +1,93 @@
+import random
+
+import numpy as np
+
+class PoissonDiskSampler:
+    """Bridson's Poisson-disk sampling on integer tiles, backed by a spatial hash grid.
+
+    Points are kept at least min_distance apart in Chebyshev distance (both axes).
+    Hash cells are min_distance wide, so a cell holds at most one point and each
+    candidate is checked against a fixed 3x3 block of cells, whatever the density.
+    """
+
+    def __init__(self, width, height, min_distance, allowed=None, margin=0, attempts=30):
+        """allowed is an optional (height, width) boolean array of tiles points may occupy"""
+        self.width = width
+        self.height = height
+        self.min_distance = max(1, min_distance)
+        self.allowed = None if allowed is None else np.asarray(allowed, dtype=bool)
+        self.margin = margin
+        self.attempts = attempts
+        self._cells = {}  # (cell_x, cell_y) -> (x, y)
+
+    def _cell(self, x, y):
+        """Hash cell holding a tile"""
+        return x // self.min_distance, y // self.min_distance
+
+    def _fits(self, x, y):
+        """Check bounds, terrain and spacing for a candidate tile"""
+        margin = self.margin
+        if not (margin <= x < self.width - margin and margin <= y < self.height - margin):
+            return False
+        if self.allowed is not None and not self.allowed[y, x]:
+            return False
+
+        cell_x, cell_y = self._cell(x, y)
+        for ny in range(cell_y - 1, cell_y + 2):
+            for nx in range(cell_x - 1, cell_x + 2):
+                point = self._cells.get((nx, ny))
+                if point and max(abs(point[0] - x), abs(point[1] - y)) < self.min_distance:
+                    return False
+        return True
+
+    def _add(self, x, y, points, active):
+        """Record an accepted point"""
+        self._cells[self._cell(x, y)] = (x, y)
+        points.append((x, y))
+        active.append((x, y))
+
+    def sample(self, rng=None):
+        """Fill the area with points; returns them as a list of (x, y) in placement order"""
+        rng = rng or random
+        distance = self.min_distance
+        points = []
+        active = []
+
+        # Every allowed tile in random order; used to (re)seed regions the active front can't reach
+        window = np.zeros((self.height, self.width), dtype=bool)
+        window[self.margin:self.height - self.margin, self.margin:self.width - self.margin] = True
+        if self.allowed is not None:
+            window &= self.allowed
+        ys, xs = np.nonzero(window)
+        order = np.random.RandomState(rng.randrange(2 ** 32)).permutation(len(xs))
+        seeds = list(zip(xs[order].tolist(), ys[order].tolist()))
+
+        while True:
+            while active:
+                index = rng.randrange(len(active))
+                x, y = active[index]
+                for _ in range(self.attempts):
+                    # Candidate in the square annulus between distance and 2 * distance
+                    dx = rng.randint(-2 * distance, 2 * distance)
+                    dy = rng.randint(-2 * distance, 2 * distance)
+                    if max(abs(dx), abs(dy)) < distance:
+                        continue
+                    if self._fits(x + dx, y + dy):
+                        self._add(x + dx, y + dy, points, active)
+                        break
+                else:
+                    # Swap-remove a point that has no room left around it
+                    active[index] = active[-1]
+                    active.pop()
+
+            while seeds:
+                x, y = seeds.pop()
+                if self._fits(x, y):
+                    self._add(x, y, points, active)
+                    break
+            if not active:
+                return points
+
+def poisson_disk_sample(width, height, min_distance, rng=None, allowed=None, margin=0, attempts=30):
+    """Sample well-spaced tiles; see PoissonDiskSampler"""
+    return PoissonDiskSampler(width, height, min_distance, allowed, margin, attempts).sample(rng)
@@ -0,0 +1,59 @@
+import threading
+
+class _Call:
+    """An in-flight call that followers can wait on"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.followers = 0
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into a single execution"""
+
+    def __init__(self):
+        """Initialize the in-flight call table"""
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.stats = {'leaders': 0, 'followers': 0}
+
+    def do(self, key, fn, *args, **kwargs):
+        """Run fn once per key at a time; returns (result, shared) where shared is True for followers"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.followers += 1
+                self.stats['followers'] += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.stats['leaders'] += 1
+                leader = True
+
+        if not leader:
+            # The leader's own deadline bounds how long we wait here
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn(*args, **kwargs)
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+        return call.result, False
+
+    def get_stats(self):
+        """Get leader/follower counters and the number of calls in flight"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats['in_flight'] = len(self._calls)
+            return stats
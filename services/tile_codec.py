@@ -0,0 +1,64 @@
+"""Compact binary encoding for region tile maps.
+
+A blob is zlib(header JSON + NUL + one uint8 palette index per tile, row-major).
+The header holds the format version, dimensions, the tile palette and any other
+map_data keys, so decode_map_data(encode_map_data(m)) == m for rectangular maps.
+"""
+import json
+import zlib
+
+import numpy as np
+
+FORMAT_VERSION = 1
+MAX_PALETTE_SIZE = 256  # Indices are stored as uint8
+
+def encode_map_data(map_data):
+    """Encode a map_data dict into a compressed blob; raises ValueError if it can't be encoded"""
+    tiles = map_data.get('tiles')
+    if not isinstance(tiles, list) or not tiles or not isinstance(tiles[0], list):
+        raise ValueError("map_data has no 2D tile list")
+
+    height = len(tiles)
+    width = len(tiles[0])
+    palette = []
+    lookup = {}
+    indices = bytearray()
+
+    for row in tiles:
+        if not isinstance(row, list) or len(row) != width:
+            raise ValueError("Tile rows must all have the same length")
+        for tile in row:
+            index = lookup.get(tile)
+            if index is None:
+                if not isinstance(tile, str):
+                    raise ValueError(f"Tile {tile!r} is not a tile name")
+                if len(palette) >= MAX_PALETTE_SIZE:
+                    raise ValueError("More distinct tiles than the palette can hold")
+                index = lookup[tile] = len(palette)
+                palette.append(tile)
+            indices.append(index)
+
+    header = {
+        'version': FORMAT_VERSION,
+        'width': width,
+        'height': height,
+        'palette': palette,
+        # Keep declared sizes and any other keys exactly as they were
+        'extra': {key: value for key, value in map_data.items() if key != 'tiles'}
+    }
+    return zlib.compress(json.dumps(header).encode('utf-8') + b'\0' + bytes(indices))
+
+def decode_map_data(blob):
+    """Decode a blob produced by encode_map_data back into a map_data dict"""
+    payload = zlib.decompress(blob)
+    header_bytes, _, index_bytes = payload.partition(b'\0')
+    header = json.loads(header_bytes.decode('utf-8'))
+    if header.get('version') != FORMAT_VERSION:
+        raise ValueError(f"Unsupported tile format version {header.get('version')}")
+
+    indices = np.frombuffer(index_bytes, dtype=np.uint8).reshape(header['height'], header['width'])
+    palette = np.asarray(header['palette'], dtype=object)
+
+    map_data = dict(header['extra'])
+    map_data['tiles'] = palette[indices].tolist()
+    return map_data
@@ -0,0 +1,147 @@
+import queue
+import threading
+from collections import OrderedDict, deque
+
+class RefillingPool:
+    """Per-key pools of generated items, topped up to capacity by background workers.
+
+    Keys are registered with a producer callable and evicted least recently used
+    beyond max_keys. Subclasses decide how items are stored and served by
+    overriding _new_pool and _store.
+    """
+
+    def __init__(self, capacity, max_keys, workers, name):
+        """Initialize the pool; capacity=0 starts no workers"""
+        self.capacity = capacity
+        self.max_keys = max_keys
+        self.name = name
+
+        # key -> pool of ready items, key -> producer callable (LRU ordered)
+        self._pools = {}
+        self._producers = OrderedDict()
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._refill_queue = queue.Queue()
+
+        self.stats = {'hits': 0, 'misses': 0, 'produced': 0, 'errors': 0}
+
+        self._workers = []
+        if capacity > 0:
+            for i in range(workers):
+                worker = threading.Thread(target=self._refill_loop, name=f"{name}-{i}", daemon=True)
+                worker.start()
+                self._workers.append(worker)
+
+    def _new_pool(self):
+        """Create the empty container for a newly registered key"""
+        return deque()
+
+    def _store(self, pool, item):
+        """Add a freshly produced item to a key's pool (lock held)"""
+        pool.append(item)
+
+    def _register_locked(self, key, producer):
+        """Track a key's producer, evicting the least recently used key (lock held)"""
+        if key in self._producers:
+            self._producers.move_to_end(key)
+            return
+
+        self._producers[key] = producer
+        self._pools[key] = self._new_pool()
+
+        while len(self._producers) > self.max_keys:
+            old_key, _ = self._producers.popitem(last=False)
+            self._pools.pop(old_key, None)
+
+    def _schedule_refill(self, key):
+        """Queue a refill unless the key is full or a refill is already pending"""
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool is None or len(pool) >= self.capacity or key in self._pending:
+                return
+            self._pending.add(key)
+        self._refill_queue.put(key)
+
+    def _refill_loop(self):
+        """Background worker: top up queued keys to capacity"""
+        while True:
+            key = self._refill_queue.get()
+            try:
+                while True:
+                    with self._lock:
+                        producer = self._producers.get(key)
+                        pool = self._pools.get(key)
+                        if producer is None or pool is None or len(pool) >= self.capacity:
+                            break
+
+                    item = producer()
+
+                    with self._lock:
+                        # The key may have been evicted while we were generating
+                        if self._pools.get(key) is not pool:
+                            break
+                        self._store(pool, item)
+                        self.stats['produced'] += 1
+            except Exception as e:
+                print(f"Error refilling {self.name} for {key}: {e}")
+                with self._lock:
+                    self.stats['errors'] += 1
+            finally:
+                with self._lock:
+                    self._pending.discard(key)
+                self._refill_queue.task_done()
+
+class ContentWarmPool(RefillingPool):
+    """Keeps pre-generated payloads ready per parameter key and refills them in the background"""
+
+    def __init__(self, pool_size=2, level_band=5, workers=2, max_keys=64):
+        """Initialize the pool; pool_size=0 disables pre-generation entirely"""
+        super().__init__(pool_size, max_keys, workers, 'warm-pool')
+        self.pool_size = pool_size
+        self.band_size = max(1, level_band)
+
+    def level_band(self, level):
+        """Map a player level to its band index"""
+        return max(0, (level or 1) - 1) // self.band_size
+
+    def band_level(self, band):
+        """Representative player level of a band (its middle), used to build pooled content"""
+        return band * self.band_size + (self.band_size + 1) // 2
+
+    def register(self, key, producer):
+        """Register a producer for a key and schedule it to be filled"""
+        if self.pool_size <= 0:
+            return
+
+        with self._lock:
+            self._register_locked(key, producer)
+        self._schedule_refill(key)
+
+    def take(self, key, producer):
+        """Pop a ready payload in O(1), or produce one inline when the pool is empty"""
+        if self.pool_size <= 0:
+            return producer()
+
+        with self._lock:
+            self._register_locked(key, producer)
+            pool = self._pools[key]
+            item = pool.popleft() if pool else None
+            if item is not None:
+                self.stats['hits'] += 1
+            else:
+                self.stats['misses'] += 1
+
+        # Replace what was taken (or fill the pool for next time)
+        self._schedule_refill(key)
+
+        if item is None:
+            return producer()
+        return item
+
+    def get_stats(self):
+        """Get hit/miss counters and the number of ready payloads per key"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats['keys'] = len(self._producers)
+            stats['ready'] = sum(len(pool) for pool in self._pools.values())
+            return stats
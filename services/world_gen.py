@@ -1,7 +1,61 @@
 import random
 import json
 import math
-from perlin_noise import PerlinNoise
+
+import numpy as np
+
+from services.dungeon_gen import DungeonGenerator
+from services.navigation import NavigationGrid, build_road_network, straight_path
+from services.noise import terrain_field, classify
+from services.sampling import poisson_disk_sample
+
+# Bump whenever a change to the procedural generator alters the map a seed produces;
+# regions stored as seed + version are then served upgraded (map and Locations together, in memory)
+# until 'flask regenerate-region-maps' stores the upgrade
+GENERATOR_VERSION = 3
+
+# Tile types for each theme; noise bands map from low to high onto tertiary, secondary, primary, accent
+THEME_TILES = {
+    'forest': {
+        'primary': 'forest',
+        'secondary': 'grass',
+        'tertiary': 'water',
+        'accent': 'rock'
+    },
+    'mountain': {
+        'primary': 'mountain',
+        'secondary': 'rock',
+        'tertiary': 'grass',
+        'accent': 'snow'
+    },
+    'desert': {
+        'primary': 'sand',
+        'secondary': 'dune',
+        'tertiary': 'rock',
+        'accent': 'cactus'
+    },
+    'swamp': {
+        'primary': 'swamp',
+        'secondary': 'water',
+        'tertiary': 'grass',
+        'accent': 'tree'
+    },
+    'town': {
+        'primary': 'grass',
+        'secondary': 'path',
+        'tertiary': 'building',
+        'accent': 'water'
+    },
+    'dungeon': {
+        'primary': 'stone',
+        'secondary': 'corridor',
+        'tertiary': 'wall',
+        'accent': 'door'
+    }
+}
+
+# Terrain landmarks can't be placed on
+LANDMARK_BLOCKED_TILES = {'water', 'wall'}
 
 class WorldGenerator:
     """Service for procedurally generating game worlds"""
@@ -9,12 +63,14 @@ class WorldGenerator:
     def __init__(self, llm_service):
         """Initialize with LLM service for narrative generation"""
         self.llm_service = llm_service
+        self.dungeon_generator = DungeonGenerator()
     
     def generate_region(self, theme, difficulty, player_level):
         """Generate a new region with theme, landmarks, and map data"""
         # Try to get region from LLM
         try:
-            region_data = self.llm_service.generate_region(theme, difficulty, player_level)
+            # Without the LLM's own fallback, so failures get a seeded map that can be regenerated
+            region_data = self.llm_service.generate_region(theme, difficulty, player_level, fallback=False)
             # Validate the response
             if self._validate_region_data(region_data):
                 return region_data
@@ -72,103 +128,52 @@ class WorldGenerator:
         
         description = descriptions.get(theme, descriptions[default_theme])
         
-        # Generate map using perlin noise for natural-looking terrain
-        width, height = 32, 32
-        map_data = self._generate_terrain_map(width, height, theme)
+        # The seed also drives the chunks generated beyond this map
+        seed = random.randint(1, 1000000)
+        generated = self.generate_seeded_region(seed, theme, difficulty)
+        
+        return {
+            "name": name,
+            "description": description,
+            "map_data": generated['map_data'],
+            "landmarks": generated['landmarks'],
+            "seed": seed,
+            "generator_version": GENERATOR_VERSION
+        }
+    
+    def generate_seeded_region(self, seed, theme, difficulty, width=32, height=32):
+        """Generate a region's map and landmarks from its seed alone; same inputs always give the same result"""
+        if theme not in THEME_TILES:
+            theme = 'forest'
+        rng = random.Random(seed)
+        
+        # Generate map using gradient noise for natural-looking terrain
+        map_data = self._generate_terrain_map(width, height, theme, seed, rng)
         
         # Generate landmarks
-        landmarks = self._generate_landmarks(width, height, theme, difficulty)
+        landmarks = self._generate_landmarks(width, height, theme, difficulty, rng, map_data['tiles'])
         
         # Add paths between landmarks
         map_data['tiles'] = self._add_paths_between_landmarks(map_data['tiles'], landmarks)
         
         return {
-            "name": name,
-            "description": description,
             "map_data": map_data,
             "landmarks": landmarks
         }
     
-    def _generate_terrain_map(self, width, height, theme):
-        """Generate terrain using perlin noise"""
-        # Initialize perlin noise generators
-        seed = random.randint(0, 1000)
-        noise1 = PerlinNoise(octaves=3, seed=seed)
-        noise2 = PerlinNoise(octaves=6, seed=seed+1)
-        noise3 = PerlinNoise(octaves=12, seed=seed+2)
-        
-        # Define tile types for each theme
-        theme_tiles = {
-            'forest': {
-                'primary': 'forest',
-                'secondary': 'grass',
-                'tertiary': 'water',
-                'accent': 'rock'
-            },
-            'mountain': {
-                'primary': 'mountain',
-                'secondary': 'rock',
-                'tertiary': 'grass',
-                'accent': 'snow'
-            },
-            'desert': {
-                'primary': 'sand',
-                'secondary': 'dune',
-                'tertiary': 'rock',
-                'accent': 'cactus'
-            },
-            'swamp': {
-                'primary': 'swamp',
-                'secondary': 'water',
-                'tertiary': 'grass',
-                'accent': 'tree'
-            },
-            'town': {
-                'primary': 'grass',
-                'secondary': 'path',
-                'tertiary': 'building',
-                'accent': 'water'
-            },
-            'dungeon': {
-                'primary': 'stone',
-                'secondary': 'corridor',
-                'tertiary': 'wall',
-                'accent': 'door'
-            }
-        }
+    def _generate_terrain_map(self, width, height, theme, seed=None, rng=None):
+        """Generate terrain using vectorized gradient noise"""
+        rng = rng or random
+        if seed is None:
+            seed = rng.randint(0, 1000)
         
-        # Default to forest if theme not recognized
-        tile_set = theme_tiles.get(theme, theme_tiles['forest'])
-        
-        # Generate tiles
-        tiles = []
-        for y in range(height):
-            row = []
-            for x in range(width):
-                # Normalize x,y to -1 to 1
-                nx, ny = x/width - 0.5, y/height - 0.5
-                
-                # Combine noise at different frequencies
-                noise_val = noise1([nx, ny]) * 0.5 + noise2([nx, ny]) * 0.3 + noise3([nx, ny]) * 0.2
-                
-                # Assign tile based on noise value
-                if noise_val < -0.15:
-                    tile = tile_set['tertiary']
-                elif noise_val < 0.1:
-                    tile = tile_set['secondary']
-                elif noise_val < 0.35:
-                    tile = tile_set['primary']
-                else:
-                    tile = tile_set['accent']
-                
-                row.append(tile)
-            tiles.append(row)
+        tiles = self._terrain_tiles(seed, width, height, theme)
         
         # Additional processing for specific themes
         if theme == 'town':
             tiles = self._add_town_features(tiles, width, height)
         elif theme == 'dungeon':
-            tiles = self._generate_dungeon_layout(width, height)
+            tiles = self._generate_dungeon_layout(width, height, rng)
         
         return {
             "width": width,
@@ -176,6 +181,45 @@ class WorldGenerator:
             "tiles": tiles
         }
     
+    def _terrain_tiles(self, seed, width, height, theme, offset_x=0, offset_y=0):
+        """Noise-based terrain for a window of world tiles starting at (offset_x, offset_y)"""
+        # Default to forest if theme not recognized
+        tile_set = THEME_TILES.get(theme, THEME_TILES['forest'])
+        
+        # Combine noise at three frequencies over the whole window at once
+        noise_field = terrain_field(seed, width, height, offset_x, offset_y)
+        
+        # Assign tiles by noise value: < -0.15, < 0.1, < 0.35, and above
+        return classify(
+            noise_field,
+            [-0.15, 0.1, 0.35],
+            [tile_set['tertiary'], tile_set['secondary'], tile_set['primary'], tile_set['accent']]
+        )
+    
+    def generate_chunk(self, seed, theme, chunk_x, chunk_y, size):
+        """Generate one size x size chunk; same inputs always give the same tiles.
+        
+        Open themes are a window of the region's terrain noise. Dungeon chunks are
+        separate BSP dungeons and town chunks are outskirts crossed by roads; both
+        open onto the middle of every chunk edge, so neighbouring chunks connect.
+        """
+        if theme == 'dungeon':
+            rng = random.Random(f"{seed}:{chunk_x}:{chunk_y}")
+            middle = size // 2
+            exits = [(middle, 0), (middle, size - 1), (0, middle), (size - 1, middle)]
+            return self.dungeon_generator.generate_tiles(size, size, rng, exits)
+        
+        if theme == 'town':
+            # No buildings outside the authored town, just countryside and the roads leading out
+            tiles = self._terrain_tiles(seed, size, size, 'forest', chunk_x * size, chunk_y * size)
+            middle = size // 2
+            for i in range(size):
+                tiles[middle][i] = 'path'
+                tiles[i][middle] = 'path'
+            return tiles
+        
+        return self._terrain_tiles(seed, size, size, theme, chunk_x * size, chunk_y * size)
+    
     def _add_town_features(self, tiles, width, height):
         """Add town-specific features to the map"""
         # Add central square
@@ -232,105 +276,17 @@ class WorldGenerator:
         
         return tiles
     
-    def _generate_dungeon_layout(self, width, height):
+    def _generate_dungeon_layout(self, width, height, rng=None):
         """Generate a dungeon layout with rooms and corridors"""
-        # Start with all walls
-        tiles = [['wall' for _ in range(width)] for _ in range(height)]
-        
-        # Room size limits
-        min_room_size = 3
-        max_room_size = 6
-        
-        # Create a few rooms
-        rooms = []
-        for _ in range(10):  # Try to place 10 rooms
-            room_width = random.randint(min_room_size, max_room_size)
-            room_height = random.randint(min_room_size, max_room_size)
-            room_x = random.randint(1, width - room_width - 1)
-            room_y = random.randint(1, height - room_height - 1)
-            
-            # Check for overlap with existing rooms
-            overlap = False
-            for existing_room in rooms:
-                rx, ry, rw, rh = existing_room
-                if (room_x <= rx + rw and rx <= room_x + room_width and
-                    room_y <= ry + rh and ry <= room_y + room_height):
-                    overlap = True
-                    break
-            
-            if not overlap:
-                rooms.append((room_x, room_y, room_width, room_height))
-                
-                # Carve out the room
-                for y in range(room_y, room_y + room_height):
-                    for x in range(room_x, room_x + room_width):
-                        tiles[y][x] = 'stone'
-        
-        # Connect rooms with corridors
-        for i in range(len(rooms) - 1):
-            room1 = rooms[i]
-            room2 = rooms[i + 1]
-            
-            # Center points of rooms
-            x1 = room1[0] + room1[2] // 2
-            y1 = room1[1] + room1[3] // 2
-            x2 = room2[0] + room2[2] // 2
-            y2 = room2[1] + room2[3] // 2
-            
-            # Draw L-shaped corridor
-            # Horizontal segment
-            for x in range(min(x1, x2), max(x1, x2) + 1):
-                tiles[y1][x] = 'corridor'
-            
-            # Vertical segment
-            for y in range(min(y1, y2), max(y1, y2) + 1):
-                tiles[y][x2] = 'corridor'
-        
-        # Add doors between rooms and corridors
-        for room in rooms:
-            rx, ry, rw, rh = room
-            
-            # Try to place a door on each side of the room
-            door_placed = False
-            
-            # Top side
-            for x in range(rx, rx + rw):
-                if ry > 0 and tiles[ry - 1][x] == 'corridor':
-                    tiles[ry][x] = 'door'
-                    door_placed = True
-                    break
-            
-            # Bottom side
-            if not door_placed:
-                for x in range(rx, rx + rw):
-                    if ry + rh < height - 1 and tiles[ry + rh][x] == 'corridor':
-                        tiles[ry + rh - 1][x] = 'door'
-                        door_placed = True
-                        break
-            
-            # Left side
-            if not door_placed:
-                for y in range(ry, ry + rh):
-                    if rx > 0 and tiles[y][rx - 1] == 'corridor':
-                        tiles[y][rx] = 'door'
-                        door_placed = True
-                        break
-            
-            # Right side
-            if not door_placed:
-                for y in range(ry, ry + rh):
-                    if rx + rw < width - 1 and tiles[y][rx + rw] == 'corridor':
-                        tiles[y][rx + rw - 1] = 'door'
-                        break
-        
-        return tiles
+        return self.dungeon_generator.generate_tiles(width, height, rng)
     
-    def _generate_landmarks(self, width, height, theme, difficulty):
-        """Generate landmarks for the region"""
+    def _generate_landmarks(self, width, height, theme, difficulty, rng=None, tiles=None):
+        """Generate landmarks for the region, avoiding blocked tiles when the tile grid is given"""
+        rng = rng or random
         landmarks = []
         
-        # Number of landmarks scales with difficulty
-        num_landmarks = max(3, min(7, difficulty + 2))
+        # Number of landmarks scales with difficulty, per 32x32 area of map
+        num_landmarks = max(3, min(7, difficulty + 2)) * max(1, (width * height) // (32 * 32))
         
         # Define landmark types appropriate for each theme
         theme_landmarks = {
@@ -347,56 +303,38 @@ class WorldGenerator:
         # Landmark name generators
         name_generators = {
             'forest': {
-                'grove': lambda: f"The {random.choice(['Whispering', 'Ancient', 'Sacred', 'Hidden', 'Moonlit'])} Grove",
-                'clearing': lambda: f"{random.choice(['Sunny', 'Peaceful', 'Hunters', 'Fey', 'Mystic'])} Clearing",
-                'ancient_tree': lambda: f"The {random.choice(['Elder', 'Grandfather', 'World', 'Heart', 'Spirit'])} Tree",
-                'waterfall': lambda: f"{random.choice(['Veil', 'Misty', 'Rainbow', 'Silver', 'Thunder'])} Falls",
-                'cave': lambda: f"{random.choice(['Shadow', 'Bear', 'Echo', 'Crystal', 'Wind'])} Cave",
-                'ruins': lambda: f"{random.choice(['Forgotten', 'Overgrown', 'Elven', 'Ancient', 'Moss-covered'])} Ruins"
+                'grove': lambda: f"The {rng.choice(['Whispering', 'Ancient', 'Sacred', 'Hidden', 'Moonlit'])} Grove",
+                'clearing': lambda: f"{rng.choice(['Sunny', 'Peaceful', 'Hunters', 'Fey', 'Mystic'])} Clearing",
+                'ancient_tree': lambda: f"The {rng.choice(['Elder', 'Grandfather', 'World', 'Heart', 'Spirit'])} Tree",
+                'waterfall': lambda: f"{rng.choice(['Veil', 'Misty', 'Rainbow', 'Silver', 'Thunder'])} Falls",
+                'cave': lambda: f"{rng.choice(['Shadow', 'Bear', 'Echo', 'Crystal', 'Wind'])} Cave",
+                'ruins': lambda: f"{rng.choice(['Forgotten', 'Overgrown', 'Elven', 'Ancient', 'Moss-covered'])} Ruins"
             },
             # Add other themes with their landmark name generators
         }
         
-        # Track used positions to avoid overlap
-        used_positions = set()
+        # Well-spaced positions at least 5 tiles apart, off blocked terrain and away from edges
+        allowed = None
+        if tiles is not None:
+            allowed = [[tile not in LANDMARK_BLOCKED_TILES for tile in row] for row in tiles]
+        positions = poisson_disk_sample(width, height, 5, rng, allowed, margin=2)
+        positions = rng.sample(positions, min(num_landmarks, len(positions)))
         
         # Ensure variance in landmark types
-        selected_types = random.sample(landmark_types, min(num_landmarks, len(landmark_types)))
+        selected_types = rng.sample(landmark_types, min(num_landmarks, len(landmark_types)))
         if len(selected_types) < num_landmarks:
             # If we need more landmarks than types, repeat some types
-            selected_types.extend(random.choices(landmark_types, k=num_landmarks - len(selected_types)))
-        
-        for i, landmark_type in enumerate(selected_types):
-            # Try to find unused position
-            attempts = 0
-            while attempts < 20:  # Limit attempts to prevent infinite loop
-                # Keep landmarks away from edges
-                x = random.randint(2, width - 3)
-                y = random.randint(2, height - 3)
-                pos = (x, y)
-                
-                # Check if position is at least 5 tiles away from other landmarks
-                too_close = False
-                for lx, ly in used_positions:
-                    if abs(x - lx) < 5 and abs(y - ly) < 5:
-                        too_close = True
-                        break
-                
-                if not too_close:
-                    used_positions.add(pos)
-                    break
-                attempts += 1
-            
-            # If couldn't find a good position, skip this landmark
-            if attempts >= 20:
-                continue
+            selected_types.extend(rng.choices(landmark_types, k=num_landmarks - len(selected_types)))
+        
+        # Small or mostly blocked maps may have room for fewer landmarks than requested
+        for landmark_type, (x, y) in zip(selected_types, positions):
             
             # Generate name
             if theme in name_generators and landmark_type in name_generators[theme]:
                 name = name_generators[theme][landmark_type]()
             else:
                 adjectives = ["Ancient", "Mystic", "Hidden", "Forgotten", "Sacred", "Mysterious"]
-                name = f"The {random.choice(adjectives)} {landmark_type.replace('_', ' ').title()}"
+                name = f"The {rng.choice(adjectives)} {landmark_type.replace('_', ' ').title()}"
             
             # Generate description
             descriptions = {
@@ -437,119 +375,33 @@ class WorldGenerator:
         return landmarks
     
     def _add_paths_between_landmarks(self, tiles, landmarks):
-        """Add paths connecting landmarks"""
+        """Add a road network connecting landmarks"""
         if len(landmarks) <= 1:
             return tiles
         
-        height = len(tiles)
-        width = len(tiles[0]) if height > 0 else 0
-        
         # Create a copy of the tiles
         new_tiles = [row.copy() for row in tiles]
         
-        # Connect landmarks with paths
-        for i in range(len(landmarks) - 1):
-            start_x, start_y = landmarks[i]['x'], landmarks[i]['y']
-            end_x, end_y = landmarks[i + 1]['x'], landmarks[i + 1]['y']
-            
-            # Use A* pathfinding to create natural-looking paths
-            path = self._find_path(tiles, start_x, start_y, end_x, end_y)
-            
-            for x, y in path:
-                if 0 <= x < width and 0 <= y < height:
-                    # Don't overwrite landmarks
-                    is_landmark = False
-                    for landmark in landmarks:
-                        if x == landmark['x'] and y == landmark['y']:
-                            is_landmark = True
-                            break
-                    
-                    if not is_landmark:
-                        # Replace with path tile (unless it's water/wall)
-                        current_tile = tiles[y][x]
-                        if current_tile not in ['water', 'wall', 'door']:
-                            new_tiles[y][x] = 'path'
+        # Roads follow the original terrain: one Dijkstra sweep, then a minimum spanning tree
+        grid = NavigationGrid(tiles)
+        landmark_positions = {(landmark['x'], landmark['y']) for landmark in landmarks}
+        roads, _ = build_road_network(grid, [(landmark['x'], landmark['y']) for landmark in landmarks])
+        
+        for y, x in zip(*np.nonzero(roads)):
+            x, y = int(x), int(y)
+            # Don't overwrite landmarks
+            if (x, y) in landmark_positions:
+                continue
+            # Replace with path tile (unless it's water/wall)
+            if tiles[y][x] not in ['water', 'wall', 'door']:
+                new_tiles[y][x] = 'path'
         
         return new_tiles
     
-    def _find_path(self, tiles, start_x, start_y, end_x, end_y):
+    def _find_path(self, tiles, start_x, start_y, end_x, end_y, grid=None):
         """Find a path between two points using A* algorithm"""
-        height = len(tiles)
-        width = len(tiles[0]) if height > 0 else 0
-        
-        # Define movement costs for different tiles
-        tile_costs = {
-            'path': 1,
-            'grass': 2,
-            'forest': 3,
-            'sand': 2,
-            'rock': 4,
-            'mountain': 5,
-            'swamp': 4,
-            'water': 10,  # High cost to avoid water
-            'wall': 50,   # Very high cost to avoid walls
-            'door': 1,
-            'corridor': 1,
-            'stone': 2
-        }
-        
-        # Define default cost for unknown tiles
-        default_cost = 2
-        
-        # A* algorithm
-        open_set = [(0, 0, start_x, start_y, [])]  # (f_score, g_score, x, y, path)
-        closed_set = set()
-        
-        while open_set:
-            open_set.sort()  # Sort by f_score
-            _, g_score, x, y, path = open_set.pop(0)
-            
-            # Check if we've reached the destination
-            if x == end_x and y == end_y:
-                return path + [(x, y)]
-            
-            # Skip if we've already processed this node
-            if (x, y) in closed_set:
-                continue
-            
-            closed_set.add((x, y))
-            
-            # Try all four directions
-            for dx, dy in [(0, 1), (1, 0), (0, -1), (-1, 0)]:
-                nx, ny = x + dx, y + dy
-                
-                # Skip if out of bounds
-                if nx < 0 or nx >= width or ny < 0 or ny >= height:
-                    continue
-                
-                # Skip if already processed
-                if (nx, ny) in closed_set:
-                    continue
-                
-                # Get tile cost
-                tile = tiles[ny][nx]
-                move_cost = tile_costs.get(tile, default_cost)
-                
-                # Calculate scores
-                new_g = g_score + move_cost
-                h = abs(nx - end_x) + abs(ny - end_y)  # Manhattan distance
-                f = new_g + h
-                
-                # Add to open set
-                open_set.append((f, new_g, nx, ny, path + [(x, y)]))
+        grid = grid or NavigationGrid(tiles)
+        path = grid.find_path((start_x, start_y), (end_x, end_y))
         
         # If no path found, return a straight line
-        path = []
-        x, y = start_x, start_y
-        while x != end_x or y != end_y:
-            path.append((x, y))
-            if x < end_x:
-                x += 1
-            elif x > end_x:
-                x -= 1
-            elif y < end_y:
-                y += 1
-            elif y > end_y:
-                y -= 1
-        
-        return path + [(end_x, end_y)]
\ No newline at end of file
+        return path or straight_path((start_x, start_y), (end_x, end_y))
@@ -280,19 +280,9 @@
     
     // Check for collisions
     function checkCollision(position, ignoreEntityId) {
-        // Check map boundaries if Game object exists
-        if (typeof Game !== 'undefined' && Game.state && Game.state.mapData) {
-            if (position.x < 0 || position.y < 0 || 
-                position.x >= Game.state.mapData.width || 
-                position.y >= Game.state.mapData.height) {
-                return true;
-            }
-            
-            // Check terrain collisions
-            const tile = Game.state.mapData.tiles[position.y][position.x];
-            const blockedTiles = ['water', 'mountain', 'wall'];
-            
-            if (blockedTiles.includes(tile)) {
+        // Check terrain collisions if Game object exists (loaded chunk tiles, not just mapData)
+        if (typeof Game !== 'undefined' && Game.isBlockedAt) {
+            if (Game.isBlockedAt(position.x, position.y)) {
                 return true;
             }
         }
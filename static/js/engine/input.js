@@ -113,18 +113,8 @@
     
     // Check for collisions
     function checkCollision(position) {
-        // Check map boundaries
-        if (position.x < 0 || position.y < 0 || 
-            position.x >= Game.state.mapData.width || 
-            position.y >= Game.state.mapData.height) {
-            return true;
-        }
-        
-        // Check terrain collisions
-        const tile = Game.state.mapData.tiles[position.y][position.x];
-        const blockedTiles = ['water', 'mountain', 'wall'];
-        
-        if (blockedTiles.includes(tile)) {
+        // Check terrain collisions; regions extend past mapData in chunks, so there is no map edge
+        if (Game.isBlockedAt(position.x, position.y)) {
             return true;
         }
         
@@ -148,7 +138,7 @@
         }
         
         // Send position update
-        fetch('/api/move', {
+        fetch('/game/api/move', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json'
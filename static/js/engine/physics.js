@@ -131,11 +131,9 @@
             return result;
         }
         
-        // Check map boundaries if Game object exists
-        if (typeof Game !== 'undefined' && Game.state && Game.state.mapData) {
-            const mapWidth = Game.state.mapData.width * config.tileSize;
-            const mapHeight = Game.state.mapData.height * config.tileSize;
-            
+        // Check tile collisions if Game object exists. Regions extend past mapData in chunks,
+        // so there is no map edge to clamp to; unloaded tiles block until they arrive
+        if (typeof Game !== 'undefined' && Game.isBlockedAt) {
             // Create bounds for the entity
             const bounds = {
                 left: newPosition.x,
@@ -144,48 +142,23 @@
                 bottom: newPosition.y + (entity.collision.height || config.tileSize)
             };
             
-            // Check map boundaries
-            if (bounds.left < 0 || bounds.right > mapWidth || 
-                bounds.top < 0 || bounds.bottom > mapHeight) {
-                result.collided = true;
-                
-                // Adjust position to stay within bounds
-                if (bounds.left < 0) result.position.x = 0;
-                if (bounds.right > mapWidth) result.position.x = mapWidth - (entity.collision.width || config.tileSize);
-                if (bounds.top < 0) result.position.y = 0;
-                if (bounds.bottom > mapHeight) result.position.y = mapHeight - (entity.collision.height || config.tileSize);
-            }
+            // Get tile coordinates for each corner of the entity
+            const tileCoords = [
+                { x: Math.floor(bounds.left / config.tileSize), y: Math.floor(bounds.top / config.tileSize) },
+                { x: Math.floor(bounds.right / config.tileSize), y: Math.floor(bounds.top / config.tileSize) },
+                { x: Math.floor(bounds.left / config.tileSize), y: Math.floor(bounds.bottom / config.tileSize) },
+                { x: Math.floor(bounds.right / config.tileSize), y: Math.floor(bounds.bottom / config.tileSize) }
+            ];
             
-            // Check tile collisions
-            if (Game.state.mapData.tiles) {
-                // Get tile coordinates for each corner of the entity
-                const tileCoords = [
-                    { x: Math.floor(bounds.left / config.tileSize), y: Math.floor(bounds.top / config.tileSize) },
-                    { x: Math.floor(bounds.right / config.tileSize), y: Math.floor(bounds.top / config.tileSize) },
-                    { x: Math.floor(bounds.left / config.tileSize), y: Math.floor(bounds.bottom / config.tileSize) },
-                    { x: Math.floor(bounds.right / config.tileSize), y: Math.floor(bounds.bottom / config.tileSize) }
-                ];
-                
-                // Check each tile
-                for (const coord of tileCoords) {
-                    // Skip if outside map
-                    if (coord.x < 0 || coord.y < 0 || 
-                        coord.x >= Game.state.mapData.width || 
-                        coord.y >= Game.state.mapData.height) {
-                        continue;
-                    }
-                    
-                    const tile = Game.state.mapData.tiles[coord.y][coord.x];
-                    const blockedTiles = ['water', 'mountain', 'wall'];
+            // Check each tile
+            for (const coord of tileCoords) {
+                if (Game.isBlockedAt(coord.x, coord.y)) {
+                    result.collided = true;
                     
-                    if (blockedTiles.includes(tile)) {
-                        result.collided = true;
-                        
-                        // TODO: Implement proper tile collision response
-                        // For now, just revert to original position
-                        result.position = { ...entity.position };
-                        break;
-                    }
+                    // TODO: Implement proper tile collision response
+                    // For now, just revert to original position
+                    result.position = { ...entity.position };
+                    break;
                 }
             }
         }
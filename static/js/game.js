@@ -12,26 +12,41 @@ const Game = (function() {
         landmarks: [],
         weather: 'clear',
         timeOfDay: 'day',
-        activeAction: null
+        activeAction: null,
+        // Window of region tiles fetched from the server; regions extend past mapData in chunks
+        viewport: null,
+        viewportLoading: false,
+        viewportRetryAt: 0,
+        // Tile types that can't be walked onto, as sent by the server (which validates moves against them)
+        blockedTiles: ['water', 'mountain', 'wall']
     };
     
     // Game canvas and context
     let canvas, ctx;
     
+    // Socket.IO connection (created on first use, if the client library is loaded)
+    let socket = null;
+    
     // Tile images
     const tileImages = {};
     const tileSize = 32;
     
     // Game initialization
-    function init(regionData, characterPosition) {
+    function init(regionData, characterPosition, blockedTiles) {
         console.log('Initializing game with region:', regionData);
         
         // Store region data
         state.regionData = regionData;
+        if (blockedTiles) {
+            state.blockedTiles = blockedTiles;
+        }
         
         // Set character position
         state.characterPosition = characterPosition || { x: 0, y: 0 };
         
+        // Connect early so streamed dialogue is available on the first NPC click
+        getSocket();
+        
         // Get canvas and context
         canvas = document.getElementById('gameCanvas');
         ctx = canvas.getContext('2d');
@@ -414,22 +429,19 @@ const Game = (function() {
         const cameraX = Math.floor(state.characterPosition.x - viewportWidth / 2);
         const cameraY = Math.floor(state.characterPosition.y - viewportHeight / 2);
         
-        // Clamp camera position to map boundaries
-        const clampedCameraX = Math.max(0, Math.min(cameraX, state.mapData.width - viewportWidth));
-        const clampedCameraY = Math.max(0, Math.min(cameraY, state.mapData.height - viewportHeight));
+        // Fetch more of the region once the camera leaves the loaded window
+        ensureViewport(cameraX, cameraY, viewportWidth, viewportHeight);
         
         // Draw visible tiles
         for (let y = 0; y < viewportHeight; y++) {
             for (let x = 0; x < viewportWidth; x++) {
-                const mapX = clampedCameraX + x;
-                const mapY = clampedCameraY + y;
+                const tileType = getTileAt(cameraX + x, cameraY + y);
                 
-                // Skip tiles outside map boundaries
-                if (mapX >= state.mapData.width || mapY >= state.mapData.height || mapX < 0 || mapY < 0) {
+                // Skip tiles that haven't been loaded yet
+                if (!tileType) {
                     continue;
                 }
                 
-                const tileType = state.mapData.tiles[mapY][mapX];
                 const tileImg = tileImages[tileType];
                 
                 if (tileImg) {
@@ -439,6 +451,68 @@ const Game = (function() {
         }
     }
     
+    // Get the tile type at a world coordinate from the loaded viewport, falling back to mapData
+    function getTileAt(x, y) {
+        const viewport = state.viewport;
+        if (viewport && x >= viewport.x && y >= viewport.y &&
+            x < viewport.x + viewport.width && y < viewport.y + viewport.height) {
+            return viewport.tiles[y - viewport.y][x - viewport.x];
+        }
+        
+        if (state.mapData && state.mapData.tiles && y >= 0 && x >= 0 &&
+            y < state.mapData.tiles.length && x < state.mapData.tiles[y].length) {
+            return state.mapData.tiles[y][x];
+        }
+        
+        return null;
+    }
+    
+    // Check whether a world coordinate can't be entered; tiles not loaded yet count as blocked
+    function isBlockedAt(x, y) {
+        const tile = getTileAt(x, y);
+        return tile === null || state.blockedTiles.includes(tile);
+    }
+    
+    // Load a window of region tiles around the camera unless it is already covered
+    function ensureViewport(cameraX, cameraY, viewportWidth, viewportHeight) {
+        const viewport = state.viewport;
+        if (state.viewportLoading || Date.now() < state.viewportRetryAt ||
+            !state.regionData || !state.regionData.id) {
+            return;
+        }
+        if (viewport && cameraX >= viewport.x && cameraY >= viewport.y &&
+            cameraX + viewportWidth <= viewport.x + viewport.width &&
+            cameraY + viewportHeight <= viewport.y + viewport.height) {
+            return;
+        }
+        
+        // Fetch a margin around the screen so small moves don't trigger another request
+        const margin = 16;
+        const params = new URLSearchParams({
+            x: cameraX - margin,
+            y: cameraY - margin,
+            width: viewportWidth + margin * 2,
+            height: viewportHeight + margin * 2
+        });
+        
+        state.viewportLoading = true;
+        fetch(`/api/world/region/${state.regionData.id}/viewport?${params}`)
+            .then(response => response.json())
+            .then(data => {
+                if (data.tiles) {
+                    state.viewport = data;
+                }
+            })
+            .catch(error => {
+                console.error('Error loading region viewport:', error);
+                // Don't retry on every frame while the server is unhappy
+                state.viewportRetryAt = Date.now() + 5000;
+            })
+            .finally(() => {
+                state.viewportLoading = false;
+            });
+    }
+    
     // Draw game entities
     function drawEntities() {
         if (!state.entities || state.entities.length === 0) {
@@ -453,22 +527,20 @@ const Game = (function() {
         const viewportHeight = Math.ceil(canvas.height / tileSize);
         const cameraX = Math.floor(state.characterPosition.x - viewportWidth / 2);
         const cameraY = Math.floor(state.characterPosition.y - viewportHeight / 2);
-        const clampedCameraX = Math.max(0, Math.min(cameraX, state.mapData.width - viewportWidth));
-        const clampedCameraY = Math.max(0, Math.min(cameraY, state.mapData.height - viewportHeight));
         
         // Draw each entity
         sortedEntities.forEach(entity => {
             // Skip entities outside viewport
-            if (entity.position.x < clampedCameraX - 1 || 
-                entity.position.y < clampedCameraY - 1 ||
-                entity.position.x > clampedCameraX + viewportWidth ||
-                entity.position.y > clampedCameraY + viewportHeight) {
+            if (entity.position.x < cameraX - 1 || 
+                entity.position.y < cameraY - 1 ||
+                entity.position.x > cameraX + viewportWidth ||
+                entity.position.y > cameraY + viewportHeight) {
                 return;
             }
             
             // Calculate screen position
-            const screenX = (entity.position.x - clampedCameraX) * tileSize;
-            const screenY = (entity.position.y - clampedCameraY) * tileSize;
+            const screenX = (entity.position.x - cameraX) * tileSize;
+            const screenY = (entity.position.y - cameraY) * tileSize;
             
             // Draw entity sprite if available
             if (entity.sprite) {
@@ -566,17 +638,23 @@ const Game = (function() {
         
         // Draw map tiles
         if (state.mapData && state.mapData.tiles) {
+            // Regions extend past mapData in chunks, so show a window of tiles around the player
             const mapWidth = state.mapData.width;
             const mapHeight = state.mapData.height;
+            const originX = Math.floor(state.characterPosition.x - mapWidth / 2);
+            const originY = Math.floor(state.characterPosition.y - mapHeight / 2);
             
-            // Scale factor to fit entire map in mini-map
+            // Scale factor to fit the window in the mini-map
             const scaleX = mapSize / mapWidth;
             const scaleY = mapSize / mapHeight;
             
             // Draw each tile
             for (let y = 0; y < mapHeight; y++) {
                 for (let x = 0; x < mapWidth; x++) {
-                    const tileType = state.mapData.tiles[y][x];
+                    const tileType = getTileAt(originX + x, originY + y);
+                    if (tileType === null) {
+                        continue;
+                    }
                     
                     // Assign color based on tile type
                     let color;
@@ -613,13 +691,17 @@ const Game = (function() {
                 }
             }
             
-            // Draw landmarks
+            // Draw landmarks inside the window
             if (state.landmarks) {
                 state.landmarks.forEach(landmark => {
+                    if (landmark.x < originX || landmark.y < originY ||
+                        landmark.x >= originX + mapWidth || landmark.y >= originY + mapHeight) {
+                        return;
+                    }
                     ctx.fillStyle = '#FF5722';
                     ctx.fillRect(
-                        canvas.width - mapSize - padding + (landmark.x * scaleX) - 1,
-                        padding + (landmark.y * scaleY) - 1,
+                        canvas.width - mapSize - padding + ((landmark.x - originX) * scaleX) - 1,
+                        padding + ((landmark.y - originY) * scaleY) - 1,
                         3,
                         3
                     );
@@ -630,8 +712,8 @@ const Game = (function() {
             ctx.fillStyle = 'white';
             ctx.beginPath();
             ctx.arc(
-                canvas.width - mapSize - padding + (state.characterPosition.x * scaleX),
-                padding + (state.characterPosition.y * scaleY),
+                canvas.width - mapSize - padding + ((state.characterPosition.x - originX) * scaleX),
+                padding + ((state.characterPosition.y - originY) * scaleY),
                 2,
                 0,
                 Math.PI * 2
@@ -823,6 +905,53 @@ const Game = (function() {
         }
     }
     
+    // Get (or open) the shared Socket.IO connection
+    function getSocket() {
+        if (!socket && typeof io !== 'undefined') {
+            socket = io();
+        }
+        return socket;
+    }
+    
+    // Stream NPC dialogue over Socket.IO, appending text as chunks arrive
+    function streamNPCDialogue(dialogueSocket, npcId, intent, dialogContent) {
+        const paragraph = document.createElement('p');
+        dialogContent.innerHTML = '';
+        dialogContent.appendChild(paragraph);
+        
+        const onChunk = data => {
+            if (String(data.npc_id) !== String(npcId)) return;
+            paragraph.textContent += data.text;
+        };
+        
+        const cleanup = () => {
+            dialogueSocket.off('dialogue_chunk', onChunk);
+            dialogueSocket.off('dialogue_complete', onComplete);
+            dialogueSocket.off('dialogue_error', onError);
+        };
+        
+        const onComplete = data => {
+            if (String(data.npc_id) !== String(npcId)) return;
+            cleanup();
+            // Replace the streamed text with the final, trimmed version
+            paragraph.textContent = data.text;
+            if (data.offers_quest) {
+                addEventMessage(`${dialogContent.dataset.npcName || 'The NPC'} seems to have a task for you.`);
+            }
+        };
+        
+        const onError = data => {
+            if (String(data.npc_id) !== String(npcId)) return;
+            cleanup();
+            paragraph.textContent = 'There seems to be a problem with the conversation.';
+        };
+        
+        dialogueSocket.on('dialogue_chunk', onChunk);
+        dialogueSocket.on('dialogue_complete', onComplete);
+        dialogueSocket.on('dialogue_error', onError);
+        dialogueSocket.emit('npc_dialogue', { npc_id: npcId, intent: intent });
+    }
+    
     // Show NPC dialog
     function showNPCDialog(npc) {
         const dialogPanel = document.getElementById('dialogPanel');
@@ -832,6 +961,7 @@ const Game = (function() {
         
         // Set dialog title
         dialogTitle.textContent = npc.name;
+        dialogContent.dataset.npcName = npc.name;
         
         // Set dialog content
         dialogContent.innerHTML = `<p>${npc.dialogue?.greeting || 'Hello there!'}</p>`;
@@ -844,6 +974,15 @@ const Game = (function() {
         talkOption.className = 'dialog-option';
         talkOption.textContent = 'Talk';
         talkOption.addEventListener('click', () => {
+            const npcId = npc.id.replace('npc_', '');
+            
+            // Prefer streaming so the first words show up while the rest is generated
+            const dialogueSocket = getSocket();
+            if (dialogueSocket && dialogueSocket.connected) {
+                streamNPCDialogue(dialogueSocket, npcId, 'greeting', dialogContent);
+                return;
+            }
+            
             // Request dialog from server
             fetch('/api/npc/dialogue', {
                 method: 'POST',
@@ -851,7 +990,7 @@ const Game = (function() {
                     'Content-Type': 'application/json'
                 },
                 body: JSON.stringify({
-                    npc_id: npc.id.replace('npc_', ''),
+                    npc_id: npcId,
                     intent: 'greeting'
                 })
             })
@@ -987,6 +1126,9 @@ const Game = (function() {
     
     // Public API
     return {
+        state,
+        getTileAt,
+        isBlockedAt,
         init,
         startExploration,
         restCharacter,